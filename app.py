@@ -1,15 +1,21 @@
 import streamlit as st
-import pandas as pd
-from googleapiclient.discovery import build
-import re
+import logging
+import uuid
 from datetime import datetime
-import csv
-from zoneinfo import ZoneInfo
-try:
-    from audio_analyzer import detect_voice_in_video
-    AUDIO_ANALYSIS_AVAILABLE = True
-except ImportError:
-    AUDIO_ANALYSIS_AVAILABLE = False
+import config
+from exporter import EXPORT_FORMATS, export_bytes
+from instrumentation import Metrics, profile_report, start_profiler
+from result_cache import ResultCache
+from table_renderer import page_count, render_page
+from video_results import SORT_OPTIONS, VideoResults
+from video_store import VideoStore
+from youtube_api import QuotaBudget
+from channel_analyzer import AUDIO_ANALYSIS_AVAILABLE, analyze_progressively, build_youtube, open_voice_cache
+from channel_resolver import get_channel_info, parse_channel_input
+
+logger = logging.getLogger(__name__)
+
+if not AUDIO_ANALYSIS_AVAILABLE:
     st.warning("⚠️ 音频分析功能不可用，请安装: pip install librosa pytube")
 
 st.set_page_config(
@@ -45,178 +51,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def extract_channel_id(url):
-    """从YouTube频道URL提取频道ID"""
-    patterns = [
-        r'youtube\.com/channel/([a-zA-Z0-9_-]+)',
-        r'youtube\.com/c/([a-zA-Z0-9_-]+)',
-        r'youtube\.com/@([a-zA-Z0-9_-]+)',
-        r'youtube\.com/user/([a-zA-Z0-9_-]+)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
-
-def get_channel_info(youtube, channel_input):
-    """获取频道信息"""
-    try:
-        # 如果是完整的频道ID
-        if channel_input.startswith('UC') and len(channel_input) == 24:
-            response = youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_input
-            ).execute()
-            if response['items']:
-                return response['items'][0]
-        
-        # 尝试通过搜索找到频道
-        search_response = youtube.search().list(
-            part='snippet',
-            q=channel_input,
-            type='channel',
-            maxResults=5
-        ).execute()
-        
-        if search_response['items']:
-            # 查找最匹配的频道
-            for item in search_response['items']:
-                channel_id = item['snippet']['channelId']
-                channel_response = youtube.channels().list(
-                    part='snippet,statistics',
-                    id=channel_id
-                ).execute()
-                
-                if channel_response['items']:
-                    channel = channel_response['items'][0]
-                    # 检查是否匹配
-                    custom_url = channel['snippet'].get('customUrl', '').lower()
-                    if (channel_input.lower() in custom_url or 
-                        custom_url in channel_input.lower()):
-                        return channel
-            
-            # 如果没有精确匹配，返回第一个结果
-            channel_id = search_response['items'][0]['snippet']['channelId']
-            channel_response = youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_id
-            ).execute()
-            
-            if channel_response['items']:
-                return channel_response['items'][0]
-                
-    except Exception as e:
-        print(f"Error getting channel info: {e}")
-    
-    return None
+@st.cache_data(max_entries=config.TABLE_CACHE_ENTRIES, show_spinner=False)
+def render_table_page(dataset_id, sort_label, tz_abbr, page, page_size, _results):
+    """渲染一页结果表格，按(数据集, 排序, 时区, 页码)缓存；_results不参与缓存键计算"""
+    start = (page - 1) * page_size
+    df_page = _results.display_frame(config.TIMEZONE_OPTIONS[tz_abbr], tz_abbr, sort_label, start, start + page_size)
+    return render_page(df_page, start)
 
-def get_videos(youtube, channel_id):
-    """获取频道所有视频，按观看量排序后返回前N个"""
-    videos = []
-    
-    # 获取上传播放列表ID
-    channel_response = youtube.channels().list(
-        part='contentDetails',
-        id=channel_id
-    ).execute()
-    
-    uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
-    
-    # 获取所有视频列表
-    next_page_token = None
-    while True:
-        playlist_response = youtube.playlistItems().list(
-            part='snippet',
-            playlistId=uploads_playlist_id,
-            maxResults=50,
-            pageToken=next_page_token
-        ).execute()
-        
-        video_ids = [item['snippet']['resourceId']['videoId'] for item in playlist_response['items']]
-        
-        # 获取视频详细信息
-        videos_response = youtube.videos().list(
-            part='snippet,statistics,contentDetails',
-            id=','.join(video_ids)
-        ).execute()
-        
-        for video in videos_response['items']:
-            videos.append(video)
-        
-        next_page_token = playlist_response.get('nextPageToken')
-        if not next_page_token:
-            break
-    
-    # 按观看量降序排序
-    videos.sort(key=lambda x: int(x['statistics'].get('viewCount', 0)), reverse=True)
-    
-    return videos
+@st.cache_resource
+def get_video_store():
+    """进程内共享的视频元数据存储"""
+    return VideoStore(config.VIDEO_STORE_PATH)
 
-def parse_duration(duration):
-    """解析YouTube时长格式"""
-    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-    if match:
-        hours = int(match.group(1) or 0)
-        minutes = int(match.group(2) or 0)
-        seconds = int(match.group(3) or 0)
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-    return "00:00:00"
+@st.cache_resource
+def get_result_cache():
+    """进程内共享的分析结果缓存，多个会话分析同一频道时只抓取一次"""
+    return ResultCache()
 
-def extract_hashtags(description):
-    """提取描述中的标签"""
-    hashtags = re.findall(r'#\w+', description)
-    return ', '.join(hashtags) if hashtags else ''
-
-def detect_voiceover(title, description, video_url=None, use_audio_analysis=False):
-    """增强的人声配音检测（基于关键词和音频分析）"""
-    # 先进行关键词检测
-    voice_keywords = [
-        'voiceover', 'voice over', 'narration', 'narrator', 'commentary', 'spoken', 'talking',
-        'guided', 'meditation', 'story', 'storytelling', 'reading', 'audiobook', 'podcast',
-        'interview', 'conversation', 'discussion', 'lecture', 'tutorial', 'explanation',
-        'teaching', 'instruction', 'speaking', 'talk', 'voice', 'audio', 'sound',
-        '配音', '解说', '讲解', '教学', '教程', '故事', '导览', '冥想', '引导',
-        '讲话', '讲座', '访谈', '对话', '讨论', '声音', '音频'
-    ]
-    
-    non_voice_keywords = [
-        'instrumental', 'music only', 'no voice', 'no talking', 'silent', 'ambient',
-        'nature sounds', 'rain sounds', 'ocean sounds', 'white noise', 'background music',
-        'piano only', 'guitar only', 'orchestral', 'classical music', 'jazz instrumental',
-        '纯音乐', '无人声', '背景音乐', '环境声', '自然声', '雨声', '海洋声'
-    ]
-    
-    text = (title + ' ' + description).lower()
-    
-    # 检查非人声关键词
-    if any(keyword in text for keyword in non_voice_keywords):
-        return {'has_voice': False, 'method': 'keyword', 'confidence': 0.9}
-    
-    # 检查人声关键词
-    keyword_result = any(keyword in text for keyword in voice_keywords)
-    
-    # 如果启用音频分析且可用
-    if use_audio_analysis and AUDIO_ANALYSIS_AVAILABLE and video_url:
-        try:
-            audio_result = detect_voice_in_video(video_url)
-            if audio_result.get('has_voice') is not None:
-                return {
-                    'has_voice': audio_result['has_voice'],
-                    'method': 'audio',
-                    'confidence': audio_result.get('confidence', 0.5)
-                }
-        except:
-            pass  # 音频分析失败，使用关键词结果
-    
-    return {'has_voice': keyword_result, 'method': 'keyword', 'confidence': 0.7 if keyword_result else 0.3}
+@st.cache_resource
+def get_voice_cache():
+    """进程内共享的人声检测结果缓存，启动时清除旧版分析规则的条目"""
+    return open_voice_cache(config.VOICE_CACHE_PATH)
 
 def main():
     st.title("📊 YouTube频道分析器")
     
     # 紧凑输入区域
-    col1, col2, col3, col4, col5 = st.columns([3, 2, 1, 1, 1])
+    col1, col2, col3, col4, col5, col6 = st.columns([3, 2, 1, 1, 1, 1])
     
     with col1:
         channel_url = st.text_input("🔗 YouTube频道链接", 
@@ -229,21 +90,22 @@ def main():
                                type="password")
     
     with col3:
-        timezone_options = {
-            "PT": "America/Los_Angeles", "ET": "America/New_York", 
-            "CST": "Asia/Shanghai", "JST": "Asia/Tokyo",
-            "GMT": "Europe/London", "UTC": "UTC"
-        }
-        selected_tz = st.selectbox("🌍 时区", list(timezone_options.keys()))
-        timezone_str = timezone_options[selected_tz]
+        selected_tz = st.selectbox("🌍 时区", list(config.TIMEZONE_OPTIONS.keys()))
+        timezone_str = config.TIMEZONE_OPTIONS[selected_tz]
     
     with col4:
-        use_audio = st.checkbox("🎧 音频分析", value=False, disabled=not AUDIO_ANALYSIS_AVAILABLE)
+        top_k = st.number_input("🏆 前N个", min_value=0, value=config.TOP_K, step=10, help="0 表示全部视频")
     
     with col5:
+        use_audio = st.checkbox("🎧 音频分析", value=False, disabled=not AUDIO_ANALYSIS_AVAILABLE)
+    
+    with col6:
         st.markdown("<br>", unsafe_allow_html=True)
         analyze_btn = st.button("🚀 分析", use_container_width=True)
     
+    profile_run = st.sidebar.checkbox("🔬 剖析下一次分析（cProfile）", value=False,
+                                      help="只剖析主线程，结果显示在诊断面板中")
+    
     if analyze_btn:
         if not api_key:
             st.error("❌ 请填写API密钥")
@@ -253,23 +115,19 @@ def main():
         if not channel_url:
             channel_url = "https://www.youtube.com/@jasonstephensonmeditation"
         
+        metrics = Metrics()
+        profiler = start_profiler() if profile_run else None
         try:
-            youtube = build('youtube', 'v3', developerKey=api_key)
+            budget = QuotaBudget(config.API_QUOTA_BUDGET)
+            youtube = build_youtube(api_key, budget=budget)
+            metrics.api_stats = youtube.stats
             
             with st.spinner("🔍 正在获取频道信息..."):
                 # 提取频道标识
-                channel_input = extract_channel_id(channel_url)
-                if not channel_input:
-                    # 从URL中提取用户名
-                    if '@' in channel_url:
-                        channel_input = channel_url.split('@')[-1]
-                    else:
-                        channel_input = channel_url.split('/')[-1]
-                
-                print(f"Searching for channel: {channel_input}")  # Debug信息
+                channel_input = parse_channel_input(channel_url)
                 
                 # 获取频道信息
-                channel_info = get_channel_info(youtube, channel_input)
+                channel_info = get_channel_info(youtube, channel_input, store=get_video_store(), metrics=metrics)
                 if not channel_info:
                     st.error("❌ 无法找到频道，请检查链接")
                     return
@@ -293,124 +151,153 @@ def main():
                     st.markdown(f'<div class="metric-card"><h3>👀 观看</h3><h2>{view_count:,}</h2></div>', unsafe_allow_html=True)
             
             with st.spinner("📊 正在分析视频数据..."):
-                # 获取频道所有视频
-                videos = get_videos(youtube, channel_id)
-                
-                # 处理视频数据
-                video_data = []
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
-                for i, video in enumerate(videos):
-                    snippet = video['snippet']
-                    statistics = video['statistics']
-                    content_details = video['contentDetails']
-                    video_url = f"https://www.youtube.com/watch?v={video['id']}"
-                    
-                    # 更新进度
-                    progress = (i + 1) / len(videos)
-                    progress_bar.progress(progress)
-                    status_text.text(f"处理视频 {i+1}/{len(videos)}: {snippet['title'][:50]}...")
-                    
-                    # 解析发布日期时间
-                    pub_datetime_utc = datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
-                    if timezone_str == 'UTC':
-                        pub_datetime_local = pub_datetime_utc
-                        tz_abbr = 'UTC'
-                    else:
-                        pub_datetime_local = pub_datetime_utc.astimezone(ZoneInfo(timezone_str))
-                        tz_abbr = selected_tz
-                    
-                    weekday_cn = ['周一', '周二', '周三', '周四', '周五', '周六', '周日'][pub_datetime_local.weekday()]
-                    formatted_date = f"{pub_datetime_local.strftime('%Y-%m-%d %H:%M')} {tz_abbr} ({weekday_cn})"
-                    
-                    # 人声检测
-                    voice_result = detect_voiceover(
-                        snippet['title'], 
-                        snippet.get('description', ''),
-                        video_url if use_audio else None,
-                        use_audio
-                    )
-                    
-                    video_data.append({
-                        'title': snippet['title'],
-                        'link': video_url,
-                        'view_count': int(statistics.get('viewCount', 0)),
-                        'duration': parse_duration(content_details['duration']),
-                        'published_date': formatted_date,
-                        'description': snippet.get('description', '')[:500],
-                        'hashtags': extract_hashtags(snippet.get('description', '')),
-                        'is_voiceover': voice_result['has_voice'],
-                        'voice_confidence': voice_result['confidence'],
-                        'detection_method': voice_result['method']
-                    })
+                live = st.empty()
+                
+                def report_progress(stage, done, total, message):
+                    # 抓取阶段没有总数，按频道视频数估计进度
+                    total = total or video_count
+                    if total:
+                        progress_bar.progress(min(done / total, 1.0))
+                    status_text.text(message)
+                
+                def show_partial(stage, results):
+                    """按观看量显示当前的部分结果（第一页）"""
+                    with metrics.span('render_partial'):
+                        html_table = render_page(results.display_frame(
+                            timezone_str, selected_tz, "观看量↓", 0, config.TABLE_PAGE_SIZE
+                        ))
+                    with live.container():
+                        if stage == 'crawl':
+                            st.caption(f"⏳ 抓取中，显示已获取视频中观看量最高的 {len(results)} 个（关键词检测结果）")
+                        else:
+                            st.caption("🎧 抓取完成，音频分析进行中，人声检测结果陆续更新")
+                        st.markdown(html_table, unsafe_allow_html=True)
+                
+                def analyze():
+                    """边抓取边处理频道视频并逐步显示部分结果，最终结果写入跨会话共享的缓存"""
+                    for stage, video_data in analyze_progressively(
+                        youtube,
+                        channel_id,
+                        store=get_video_store(),
+                        top_k=top_k or None,
+                        use_audio=use_audio,
+                        voice_cache=get_voice_cache() if use_audio else None,
+                        progress=report_progress,
+                        metrics=metrics
+                    ):
+                        results = VideoResults.from_records(video_data)
+                        if stage != 'done':
+                            show_partial(stage, results)
+                    return {
+                        'results': results,
+                        'dataset_id': uuid.uuid4().hex,
+                        'created_at': datetime.now(),
+                        'complete': not budget.exhausted
+                    }
+                
+                # 同一频道和选项的分析在所有会话间共享，同时发起的请求只抓取一次
+                analysis, source = get_result_cache().get_or_compute(
+                    (channel_id, top_k or None, use_audio),
+                    analyze,
+                    size_of=lambda analysis: analysis['results'].memory_bytes(),
+                    cache_if=lambda analysis: analysis['complete'],
+                    on_wait=lambda: status_text.text("⏳ 其他会话正在分析同一频道，等待其结果...")
+                )
+                metrics.count(f'result_cache.{source}')
                 
                 progress_bar.empty()
                 status_text.empty()
+                live.empty()
+                
+                if not analysis['complete']:
+                    st.warning("⚠️ API配额预算已用完，结果只包含已抓取的视频")
+                if source == 'computed':
+                    st.caption(f"📡 本次消耗API配额 {budget.used} 单位")
+                else:
+                    st.caption(f"♻️ 使用 {analysis['created_at'].strftime('%H:%M')} 的共享分析结果，本次消耗API配额 {budget.used} 单位")
                 
                 # 存储数据到session state
-                st.session_state.video_data = video_data
+                st.session_state.results = analysis['results']
+                st.session_state.dataset_id = analysis['dataset_id']
                 st.session_state.channel_title = channel_title
                 st.session_state.analysis_complete = True
                 
+                # 结构化日志：每次分析一行JSON
+                logger.info(metrics.to_json(event='analysis', channel_id=channel_id, videos=len(analysis['results']),
+                                            result_cache=source))
+                
         except Exception as e:
             st.error(f"❌ 错误: {str(e)}")
+        finally:
+            st.session_state.metrics = metrics
+            st.session_state.profile_report = None
+            if profiler is not None:
+                profiler.disable()
+                st.session_state.profile_report = profile_report(profiler)
                 
     # 如果分析完成，显示结果和排序选项
     if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_complete:
-        df = pd.DataFrame(st.session_state.video_data)
+        results = st.session_state.results
+        metrics = st.session_state.metrics
+        pages = page_count(len(results), config.TABLE_PAGE_SIZE)
         
         # 紧凑结果显示
-        col1, col2, col3 = st.columns([2, 2, 1])
+        col1, col2, col3, col4, col5 = st.columns([2, 2, 1, 1, 1])
         with col1:
-            st.markdown(f"**📋 视频列表 ({len(st.session_state.video_data)} 个)**")
+            st.markdown(f"**📋 视频列表 ({len(results)} 个)**")
         with col2:
-            sort_options = {
-                "观看量↓": ("view_count", False), "观看量↑": ("view_count", True),
-                "最新": ("published_date", False), "最早": ("published_date", True),
-                "有配音": ("is_voiceover", False), "无配音": ("is_voiceover", True)
-            }
-            selected_sort = st.selectbox("📊 排序", list(sort_options.keys()), key="sort_selector")
-            sort_column, ascending = sort_options[selected_sort]
-            df_sorted = df.sort_values(by=sort_column, ascending=ascending)
+            selected_sort = st.selectbox("📊 排序", list(SORT_OPTIONS.keys()), key="sort_selector")
         with col3:
-            csv_data = df_sorted.to_csv(index=False, encoding='utf-8-sig')
-            csv_filename = f"{st.session_state.channel_title.replace(' ', '_')}_videos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            st.download_button("📥 CSV", csv_data.encode('utf-8-sig'), csv_filename, "text/csv", use_container_width=True, type="secondary")
-        
-        # 排序后重新设置索引从1开始并创建可点击标题
-        df_display = df_sorted.copy().reset_index(drop=True)
-        df_display.index = df_display.index + 1
-        df_display['clickable_title'] = df_display.apply(
-            lambda row: f'<a href="{row["link"]}" target="_blank">{row["title"]}</a>', axis=1
-        )
-        
-        # 使用HTML表格显示可点击标题
-        html_table = "<div style='height: 400px; overflow-y: auto; border: 1px solid #000;'>"
-        html_table += "<table style='width:100%; border-collapse: collapse;'>"
-        html_table += "<thead style='position: sticky; top: 0; background-color: #f8f9fa;'>"
-        html_table += "<tr style='border: 1px solid #000;'>"
-        html_table += "<th style='padding: 8px; border: 1px solid #000; text-align: center; width: 50px;'>#</th>"
-        html_table += "<th style='padding: 8px; border: 1px solid #000; text-align: left;'>标题</th>"
-        html_table += "<th style='padding: 8px; border: 1px solid #000; text-align: center;'>观看量</th>"
-        html_table += "<th style='padding: 8px; border: 1px solid #000; text-align: center;'>时长</th>"
-        html_table += "<th style='padding: 8px; border: 1px solid #000; text-align: center;'>发布日期</th>"
-        html_table += "<th style='padding: 8px; border: 1px solid #000; text-align: center;'>🎤人声</th>"
-        html_table += "</tr></thead><tbody>"
-        
-        for idx, row in df_display.iterrows():
-            html_table += f"<tr style='border: 1px solid #ddd;'>"
-            html_table += f"<td style='padding: 8px; border: 1px solid #ddd; text-align: center; font-weight: bold;'>{idx}</td>"
-            html_table += f"<td style='padding: 8px; border: 1px solid #ddd;'><a href='{row['link']}' target='_blank' style='color: #0066cc; text-decoration: none;'>{row['title']}</a></td>"
-            html_table += f"<td style='padding: 8px; border: 1px solid #ddd; text-align: center;'>{row['view_count']:,}</td>"
-            html_table += f"<td style='padding: 8px; border: 1px solid #ddd; text-align: center;'>{row['duration']}</td>"
-            html_table += f"<td style='padding: 8px; border: 1px solid #ddd; text-align: center;'>{row['published_date']}</td>"
-            html_table += f"<td style='padding: 8px; border: 1px solid #ddd; text-align: center;'>{'✅' if row['is_voiceover'] else '❌'}</td>"
-            html_table += "</tr>"
-        
-        html_table += "</tbody></table></div>"
+            # 页码按数据集分别保存，新的分析结果从第1页开始，不会沿用超出新页数的旧页码
+            page = st.number_input(f"📄 页码（共{pages}页）", min_value=1, max_value=pages, value=1,
+                                   key=f"page_selector_{st.session_state.dataset_id}")
+        with col4:
+            export_format = st.selectbox("💾 格式", list(EXPORT_FORMATS), key="export_format")
+        with col5:
+            # 导出只在点击时生成，结果按(数据集, 排序, 时区, 格式)保留到这些选项改变为止
+            st.markdown("<br>", unsafe_allow_html=True)
+            export_key = (st.session_state.dataset_id, selected_sort, selected_tz, export_format)
+            mime, extension = EXPORT_FORMATS[export_format]
+            if st.session_state.get('export_key') == export_key:
+                st.download_button("📥 下载", st.session_state.export_data, st.session_state.export_filename, mime,
+                                   use_container_width=True, type="secondary")
+            elif st.button("📦 导出", use_container_width=True):
+                with st.spinner("正在导出..."), metrics.span('export'):
+                    st.session_state.export_data = export_bytes(
+                        results, export_format, timezone_str, selected_tz, selected_sort
+                    )
+                metrics.add_bytes('export', len(st.session_state.export_data))
+                st.session_state.export_filename = f"{st.session_state.channel_title.replace(' ', '_')}_videos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+                st.session_state.export_key = export_key
+                st.rerun()
         
+        # 使用HTML表格显示可点击标题，只渲染当前页
+        with metrics.span('render_table'):
+            html_table = render_table_page(
+                st.session_state.dataset_id, selected_sort, selected_tz, page, config.TABLE_PAGE_SIZE, results
+            )
+        metrics.add_bytes('render_table.html', len(html_table))
         st.markdown(html_table, unsafe_allow_html=True)
+        
+        # 诊断面板：各阶段耗时、计数、字节数、API调用统计和可选的剖析结果
+        with st.expander("🩺 诊断", expanded=False):
+            st.table(metrics.span_rows())
+            snapshot = metrics.snapshot()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**计数**")
+                st.json(snapshot['counts'])
+            with col2:
+                st.markdown("**字节数**")
+                st.json(snapshot['bytes'])
+            st.code(metrics.to_text(), language="text")
+            st.download_button("📄 指标JSON", metrics.to_json(), "metrics.json", "application/json")
+            if st.session_state.get('profile_report'):
+                st.markdown("**cProfile（累计耗时前30）**")
+                st.code(st.session_state.profile_report, language="text")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
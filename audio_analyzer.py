@@ -1,15 +1,82 @@
-import librosa
-import numpy as np
-import requests
-import tempfile
+"""
+音频人声分析
+
+librosa、numpy和pytube在首次使用时才导入，只计算分析器指纹或解析链接时不会加载音频依赖；
+临时文件、子进程和进程池用到的标准库模块也在使用时才导入。
+"""
 import os
-from pytube import YouTube
+import hashlib
+import json
+import time
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+import config
+from instrumentation import NULL_METRICS
+
+# 分析规则版本：修改analyze_voice_content或流式人声检测的判断逻辑时递增，使缓存的旧结果失效
+ANALYZER_VERSION = 3
+
+# 人声判断阈值（按16kHz、n_fft=1024的特征调定，与旧版22050Hz特征的判断对照见benchmarks/bench_voice_features.py）
+# 16kHz下8kHz以上的能量被截掉，宽带信号的频谱质心约为22050Hz时的0.73倍，上限由4000降到2900；
+# 过零率按每个采样计数，同一信号约为22050Hz时的1.38倍，下限由0.01升到0.014
+VOICE_CENTROID_RANGE = (1000, 2900)  # 人声频率范围（Hz）
+MIN_VOICE_ZCR = 0.014  # 语音活动
+MIN_MFCC_VARIANCE = 10  # 语音变化
+CONFIDENCE_MFCC_VARIANCE = 50  # 置信度达到1.0时的MFCC方差
+
+# 流式逐帧人声检测阈值
+VAD_CENTROID_RANGE = (500, 4000)  # 单帧人声的频谱质心范围（Hz），比整段平均值的范围宽
+VAD_ENERGY_RANGE_DB = 40  # 比已分析部分峰值低这么多（dB）以内的帧才参与判断，更安静的帧视为静音
+VAD_MAX_FLATNESS = 0.3  # 频谱平坦度上限，超过视为噪声
+VAD_CONTEXT_FRAMES = 8  # 计算MFCC局部变化的上下文帧数（约0.25秒）
+VAD_MIN_MFCC_MODULATION = 8.0  # MFCC局部标准差下限，持续的乐音变化慢，达不到这个值
+VAD_SPEECH_FRACTION = 0.2  # 人声帧比例超过这个值判定为有人声
+VAD_SEGMENT_SECONDS = 0.25  # 相邻帧高度相关，按这个时长折算独立样本数
+VAD_Z = 2.0  # 提前停止所需的置信区间z值
+
+def analyzer_fingerprint():
+    """分析器指纹：规则版本、阈值和音频参数的摘要，作为结果缓存键的一部分"""
+    params = {
+        'version': ANALYZER_VERSION,
+        'centroid_range': VOICE_CENTROID_RANGE,
+        'min_zcr': MIN_VOICE_ZCR,
+        'min_mfcc_variance': MIN_MFCC_VARIANCE,
+        'confidence_mfcc_variance': CONFIDENCE_MFCC_VARIANCE,
+        'sample_rate': config.AUDIO_SAMPLE_RATE,
+        'n_fft': config.AUDIO_N_FFT,
+        'hop_length': config.AUDIO_HOP_LENGTH,
+        'window_seconds': config.AUDIO_WINDOW_SECONDS,
+        'windows': config.AUDIO_WINDOWS,
+        'streaming': config.AUDIO_STREAMING_VAD,
+        'vad_block_seconds': config.VAD_BLOCK_SECONDS,
+        'vad_min_seconds': config.VAD_MIN_SECONDS,
+        'vad_min_negative_seconds': config.VAD_MIN_NEGATIVE_SECONDS,
+        'vad_centroid_range': VAD_CENTROID_RANGE,
+        'vad_energy_range_db': VAD_ENERGY_RANGE_DB,
+        'vad_max_flatness': VAD_MAX_FLATNESS,
+        'vad_context_frames': VAD_CONTEXT_FRAMES,
+        'vad_min_mfcc_modulation': VAD_MIN_MFCC_MODULATION,
+        'vad_speech_fraction': VAD_SPEECH_FRACTION,
+        'vad_segment_seconds': VAD_SEGMENT_SECONDS,
+        'vad_z': VAD_Z
+    }
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+def video_id_from_url(video_url):
+    """从watch链接中提取视频ID，无法识别时返回原链接"""
+    parsed = urlparse(video_url)
+    if parsed.hostname == 'youtu.be':
+        return parsed.path.lstrip('/') or video_url
+    return parse_qs(parsed.query).get('v', [video_url])[0]
 
 def download_audio_sample(video_url, duration=30):
-    """下载视频的音频样本（前30秒）"""
+    """下载视频的完整音频流到临时文件（没有ffmpeg时的后备方案，分析时只读取前duration秒）"""
+    import tempfile
+    from pytube import YouTube
+    
     try:
         yt = YouTube(video_url)
-        audio_stream = yt.streams.filter(only_audio=True).first()
+        audio_stream = yt.streams.filter(only_audio=True).order_by('abr').first()
         
         with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as tmp_file:
             audio_stream.download(filename=tmp_file.name)
@@ -17,62 +84,601 @@ def download_audio_sample(video_url, duration=30):
     except:
         return None
 
-def analyze_voice_content(audio_file):
-    """分析音频文件中的人声内容"""
+def window_offsets(length, duration, windows):
+    """在视频时长内均匀分布windows个窗口，返回各窗口起点（秒）"""
+    if windows <= 1 or not length or length <= duration:
+        return [0.0]
+    window = duration / windows
+    return [max(length * (i + 1) / (windows + 1) - window / 2, 0.0) for i in range(windows)]
+
+def _ffmpeg_decode(stream_url, offset, duration, sr):
+    """用ffmpeg解码音频流的一个时间窗口为单声道float32采样
+
+    -ss放在-i之前做输入端跳转，ffmpeg通过HTTP Range请求只读取窗口附近的数据。
+    """
+    import subprocess
+    import numpy as np
+    
+    cmd = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-ss', f'{offset:.2f}', '-t', f'{duration:.2f}', '-i', stream_url,
+        '-vn', '-ac', '1', '-ar', str(sr), '-f', 'f32le', 'pipe:1'
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          timeout=config.AUDIO_TIMEOUT, check=True)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+def fetch_audio_window(video_url, duration=config.AUDIO_WINDOW_SECONDS, windows=config.AUDIO_WINDOWS,
+                       sr=config.AUDIO_SAMPLE_RATE):
+    """只拉取分析所需的音频片段并直接解码到内存
+
+    windows为1时取开头duration秒；大于1时把duration秒平分成多个短窗口，
+    均匀分布在整个视频中。失败时返回None。
+    """
+    import numpy as np
+    from pytube import YouTube
+    
+    try:
+        yt = YouTube(video_url)
+        audio_stream = yt.streams.filter(only_audio=True).order_by('abr').first()
+        offsets = window_offsets(yt.length, duration, windows)
+        window = duration / len(offsets)
+        samples = [_ffmpeg_decode(audio_stream.url, offset, window, sr) for offset in offsets]
+        y = np.concatenate(samples)
+        return y if y.size else None
+    except Exception as e:
+        print(f"音频片段获取错误: {e}")
+        return None
+
+def load_audio_sample(video_url):
+    """获取用于分析的音频：有ffmpeg时只拉取分析窗口，否则下载完整音频到临时文件"""
+    import shutil
+    
+    if shutil.which('ffmpeg'):
+        return fetch_audio_window(video_url)
+    return download_audio_sample(video_url, duration=config.AUDIO_WINDOW_SECONDS)
+
+def _ffmpeg_blocks(stream_url, offset, duration, sr, block_samples):
+    """用ffmpeg流式解码音频流的一个时间窗口，逐块产出单声道float32采样
+
+    调用方提前停止迭代（关闭生成器）时立即结束ffmpeg进程，不再读取后面的数据；
+    ffmpeg中途失败（非零退出码）时在最后一块之后抛出CalledProcessError。
+    """
+    import subprocess
+    import numpy as np
+    
+    cmd = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-rw_timeout', str(int(config.AUDIO_TIMEOUT * 1e6)),
+        '-ss', f'{offset:.2f}', '-t', f'{duration:.2f}', '-i', stream_url,
+        '-vn', '-ac', '1', '-ar', str(sr), '-f', 'f32le', 'pipe:1'
+    ]
+    # -loglevel error时stderr只有少量错误信息，读完stdout后再读取不会阻塞
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     try:
-        # 加载音频（只分析前30秒）
-        y, sr = librosa.load(audio_file, duration=30)
+        while True:
+            data = proc.stdout.read(block_samples * 4)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.float32)
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd[0], stderr=proc.stderr.read())
+    finally:
+        proc.kill()
+        proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+def file_audio_blocks(audio_file, duration=config.AUDIO_WINDOW_SECONDS, sr=config.AUDIO_SAMPLE_RATE,
+                      block_seconds=config.VAD_BLOCK_SECONDS):
+    """逐块读取音频文件开头duration秒，重采样到sr
+
+    soundfile支持的格式（WAV、FLAC、OGG等）按块解码；其他格式（如pytube下载的mp4）
+    先用librosa解码整个分析窗口再分块。
+    """
+    import librosa
+    import soundfile
+    
+    block_samples = int(block_seconds * sr)
+    try:
+        native_sr = soundfile.info(audio_file).samplerate
+    except Exception:
+        y, _ = librosa.load(audio_file, sr=sr, duration=duration)
+        for start in range(0, len(y), block_samples):
+            yield y[start:start + block_samples]
+        return
+    
+    native_block = int(block_seconds * native_sr)
+    frames = int(duration * native_sr)
+    for block in soundfile.blocks(audio_file, blocksize=native_block, frames=frames, dtype='float32', always_2d=True):
+        y = block.mean(axis=1)
+        yield y if native_sr == sr else librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+
+def stream_audio_blocks(video_url, duration=config.AUDIO_WINDOW_SECONDS, windows=config.AUDIO_WINDOWS,
+                        sr=config.AUDIO_SAMPLE_RATE, block_seconds=config.VAD_BLOCK_SECONDS):
+    """逐块产出视频分析窗口内的音频采样，供流式人声检测提前停止
+
+    有ffmpeg时直接从音频流按块解码（窗口分布同fetch_audio_window）；
+    否则下载完整音频到临时文件后按块读取，迭代结束或提前停止时删除文件。
+    """
+    import shutil
+    
+    if shutil.which('ffmpeg'):
+        from pytube import YouTube
         
-        # 提取音频特征
-        # 1. MFCC特征（人声特征）
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        yt = YouTube(video_url)
+        audio_stream = yt.streams.filter(only_audio=True).order_by('abr').first()
+        offsets = window_offsets(yt.length, duration, windows)
+        window = duration / len(offsets)
+        for offset in offsets:
+            yield from _ffmpeg_blocks(audio_stream.url, offset, window, sr, int(block_seconds * sr))
+        return
+    
+    audio_file = download_audio_sample(video_url, duration=duration)
+    if audio_file is None:
+        return
+    try:
+        yield from file_audio_blocks(audio_file, duration, sr, block_seconds)
+    finally:
+        if os.path.exists(audio_file):
+            os.unlink(audio_file)
+
+def extract_voice_features(y, sr=config.AUDIO_SAMPLE_RATE, n_fft=config.AUDIO_N_FFT,
+                           hop_length=config.AUDIO_HOP_LENGTH):
+    """基于一次STFT提取全部人声特征
+
+    MFCC、频谱质心和频谱带宽都从同一个STFT幅度谱推导，过零率直接在时域按相同分帧计算。
+    y可以是单个片段(n_samples,)，也可以是等长片段堆叠成的(n_clips, n_samples)，
+    后者一次完成整批计算，返回每个片段的voice_indicators列表。
+    """
+    import librosa
+    import numpy as np
+    
+    y = np.asarray(y, dtype=np.float32)
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+    
+    # 1. MFCC特征（人声特征）；top_db按片段各自的峰值截断，保证批量与单独计算一致
+    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S ** 2, sr=sr, n_fft=n_fft), top_db=None)
+    mel_db = np.maximum(mel_db, mel_db.max(axis=(-2, -1), keepdims=True) - 80.0)
+    mfccs = librosa.feature.mfcc(S=mel_db, n_mfcc=13)
+    
+    # 2. 频谱质心（音调特征）
+    spectral_centroids = librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=n_fft)
+    
+    # 3. 过零率（语音活动指标）
+    zcr = librosa.feature.zero_crossing_rate(y, frame_length=n_fft, hop_length=hop_length)
+    
+    # 4. 频谱带宽
+    spectral_bandwidth = librosa.feature.spectral_bandwidth(S=S, sr=sr, n_fft=n_fft, centroid=spectral_centroids)
+    
+    indicators = {
+        'avg_spectral_centroid': spectral_centroids.mean(axis=(-2, -1)),
+        'avg_zcr': zcr.mean(axis=(-2, -1)),
+        'avg_bandwidth': spectral_bandwidth.mean(axis=(-2, -1)),
+        'mfcc_variance': mfccs.var(axis=(-2, -1))
+    }
+    if y.ndim == 1:
+        return {name: float(value) for name, value in indicators.items()}
+    return [{name: float(value[i]) for name, value in indicators.items()} for i in range(y.shape[0])]
+
+def classify_voice(voice_indicators):
+    """根据特征判断是否包含人声"""
+    low, high = VOICE_CENTROID_RANGE
+    is_voice = (
+        low < voice_indicators['avg_spectral_centroid'] < high and  # 人声频率范围
+        voice_indicators['avg_zcr'] > MIN_VOICE_ZCR and  # 语音活动
+        voice_indicators['mfcc_variance'] > MIN_MFCC_VARIANCE  # 语音变化
+    )
+    
+    return {
+        'has_voice': is_voice,
+        'confidence': min(voice_indicators['mfcc_variance'] / CONFIDENCE_MFCC_VARIANCE, 1.0),
+        'features': voice_indicators
+    }
+
+def analyze_voice_content(audio, sr=config.AUDIO_SAMPLE_RATE):
+    """分析音频中的人声内容
+
+    audio可以是音频文件路径（分析后删除），也可以是已解码的单声道采样数组（采样率为sr）。
+    """
+    import librosa
+    
+    audio_file = audio if isinstance(audio, str) else None
+    try:
+        if audio_file:
+            # 加载音频（只分析分析窗口长度，直接重采样到人声采样率）
+            y, sr = librosa.load(audio_file, sr=sr, duration=config.AUDIO_WINDOW_SECONDS)
+        else:
+            y = audio
         
-        # 2. 频谱质心（音调特征）
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+        return classify_voice(extract_voice_features(y, sr))
         
-        # 3. 过零率（语音活动指标）
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
+    except Exception as e:
+        print(f"音频分析错误: {e}")
+        # 分析失败不是"无人声"的结论，不写入缓存，保留关键词检测结果
+        return {'has_voice': None, 'confidence': 0.0, 'error': f'音频分析失败: {e}'}
+    
+    finally:
+        # 清理临时文件
+        if audio_file and os.path.exists(audio_file):
+            os.unlink(audio_file)
+
+def analyze_voice_batch(clips, sr=config.AUDIO_SAMPLE_RATE):
+    """批量分析多个已解码的音频片段，等长片段堆叠后一次计算，结果与输入顺序一致"""
+    import numpy as np
+    
+    results = [None] * len(clips)
+    groups = {}
+    for i, clip in enumerate(clips):
+        groups.setdefault(len(clip), []).append(i)
+    
+    for indices in groups.values():
+        try:
+            batch = np.stack([clips[i] for i in indices])
+            for i, voice_indicators in zip(indices, extract_voice_features(batch, sr)):
+                results[i] = classify_voice(voice_indicators)
+        except Exception as e:
+            print(f"音频分析错误: {e}")
+            for i in indices:
+                results[i] = {'has_voice': None, 'confidence': 0.0, 'error': f'音频分析失败: {e}'}
+    
+    return results
+
+class VoiceActivityStream:
+    """流式逐帧人声检测：逐块输入采样，累计每帧是否为人声
+
+    每帧（n_fft窗长、hop_length帧移，跨块连续）满足以下全部条件时计为人声帧：
+    能量不低于已分析部分峰值VAD_ENERGY_RANGE_DB以上、频谱平坦度低（不是噪声）、
+    频谱质心在VAD_CENTROID_RANGE内、有过零活动、前VAD_CONTEXT_FRAMES帧内MFCC变化明显
+    （语音的音节变化快，持续的乐音变化慢）。按帧判断，短的人声片段不会被整段平均抹掉。
+    """
+
+    def __init__(self, sr=config.AUDIO_SAMPLE_RATE, n_fft=config.AUDIO_N_FFT, hop_length=config.AUDIO_HOP_LENGTH):
+        import numpy as np
         
-        # 4. 频谱带宽
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self._pending = np.zeros(0, dtype=np.float32)  # 不足一帧、留给下一块的采样
+        self._mfcc_context = None  # 上一块最后VAD_CONTEXT_FRAMES-1帧的MFCC
+        self._peak_db = -np.inf
+        self.samples = 0
+        self.frames = 0
+        self.speech_frames = 0
+        self.first_speech_frame = None
+        self._feature_sums = {'avg_spectral_centroid': 0.0, 'avg_zcr': 0.0, 'avg_flatness': 0.0,
+                              'avg_mfcc_modulation': 0.0}
+
+    def feed(self, block):
+        """输入一块单声道采样（采样率sr）"""
+        import librosa
+        import numpy as np
         
-        # 人声检测逻辑
-        voice_indicators = {
-            'avg_spectral_centroid': np.mean(spectral_centroids),
-            'avg_zcr': np.mean(zcr),
-            'avg_bandwidth': np.mean(spectral_bandwidth),
-            'mfcc_variance': np.var(mfccs)
-        }
+        block = np.asarray(block, dtype=np.float32)
+        self.samples += block.size
+        y = np.concatenate([self._pending, block])
+        if y.size < self.n_fft:
+            self._pending = y
+            return
+        n_frames = 1 + (y.size - self.n_fft) // self.hop_length
+        used = (n_frames - 1) * self.hop_length + self.n_fft
+        self._pending = y[n_frames * self.hop_length:]
+        y = y[:used]
+        
+        S = np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length, center=False))
+        power_db = 10 * np.log10(np.mean(S ** 2, axis=0) + 1e-10)
+        centroid = librosa.feature.spectral_centroid(S=S, sr=self.sr, n_fft=self.n_fft)[0]
+        flatness = librosa.feature.spectral_flatness(S=S)[0]
+        zcr = librosa.feature.zero_crossing_rate(y, frame_length=self.n_fft, hop_length=self.hop_length,
+                                                 center=False)[0]
         
-        # 人声判断规则
-        is_voice = (
-            1000 < voice_indicators['avg_spectral_centroid'] < 4000 and  # 人声频率范围
-            voice_indicators['avg_zcr'] > 0.01 and  # 语音活动
-            voice_indicators['mfcc_variance'] > 10  # 语音变化
+        # MFCC用绝对dB刻度，各块之间可比；局部变化取前后文窗口内各系数标准差的平均（不含能量项c0）
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S ** 2, sr=self.sr, n_fft=self.n_fft),
+                                     top_db=None)
+        mfccs = librosa.feature.mfcc(S=np.maximum(mel_db, -100.0), n_mfcc=13)[1:]
+        if self._mfcc_context is None:
+            self._mfcc_context = np.repeat(mfccs[:, :1], VAD_CONTEXT_FRAMES - 1, axis=1)
+        context = np.concatenate([self._mfcc_context, mfccs], axis=1)
+        self._mfcc_context = context[:, -(VAD_CONTEXT_FRAMES - 1):]
+        windows = np.lib.stride_tricks.sliding_window_view(context, VAD_CONTEXT_FRAMES, axis=1)
+        modulation = windows.std(axis=-1).mean(axis=0)
+        
+        self._peak_db = max(self._peak_db, float(power_db.max()))
+        low, high = VAD_CENTROID_RANGE
+        is_speech = (
+            (power_db > self._peak_db - VAD_ENERGY_RANGE_DB) &
+            (flatness < VAD_MAX_FLATNESS) &
+            (centroid > low) & (centroid < high) &
+            (zcr > MIN_VOICE_ZCR) &
+            (modulation > VAD_MIN_MFCC_MODULATION)
         )
         
+        if self.first_speech_frame is None and is_speech.any():
+            self.first_speech_frame = self.frames + int(np.argmax(is_speech))
+        self.frames += n_frames
+        self.speech_frames += int(is_speech.sum())
+        for name, values in (('avg_spectral_centroid', centroid), ('avg_zcr', zcr), ('avg_flatness', flatness),
+                             ('avg_mfcc_modulation', modulation)):
+            self._feature_sums[name] += float(values.sum())
+
+    @property
+    def seconds(self):
+        """已分析的音频时长（秒）"""
+        return self.samples / self.sr
+
+    @property
+    def speech_fraction(self):
+        return self.speech_frames / self.frames if self.frames else 0.0
+
+    def bounds(self):
+        """人声帧比例的Wilson置信区间，样本数按VAD_SEGMENT_SECONDS折算"""
+        n = self.frames * self.hop_length / self.sr / VAD_SEGMENT_SECONDS
+        if n <= 0:
+            return 0.0, 1.0
+        p = self.speech_fraction
+        z2 = VAD_Z ** 2
+        center = (p + z2 / (2 * n)) / (1 + z2 / n)
+        margin = VAD_Z * (p * (1 - p) / n + z2 / (4 * n * n)) ** 0.5 / (1 + z2 / n)
+        return max(center - margin, 0.0), min(center + margin, 1.0)
+
+    def decided(self, min_seconds=config.VAD_MIN_SECONDS, min_negative_seconds=config.VAD_MIN_NEGATIVE_SECONDS):
+        """结论是否已足够确定：置信区间整体高于VAD_SPEECH_FRACTION且分析满min_seconds，
+        或整体低于阈值且分析满min_negative_seconds"""
+        lower, upper = self.bounds()
+        if lower > VAD_SPEECH_FRACTION:
+            return self.seconds >= min_seconds
+        if upper < VAD_SPEECH_FRACTION:
+            return self.seconds >= min_negative_seconds
+        return False
+
+    def result(self):
+        """当前的检测结果；confidence为置信区间中落在结论一侧的比例，提前停止时为1"""
+        lower, upper = self.bounds()
+        has_voice = self.speech_fraction > VAD_SPEECH_FRACTION
+        if has_voice:
+            agreeing = upper - max(lower, VAD_SPEECH_FRACTION)
+        else:
+            agreeing = min(upper, VAD_SPEECH_FRACTION) - lower
+        confidence = agreeing / (upper - lower) if upper > lower else 1.0
+        first_speech = self.first_speech_frame
         return {
-            'has_voice': is_voice,
-            'confidence': min(voice_indicators['mfcc_variance'] / 50, 1.0),
-            'features': voice_indicators
+            'has_voice': has_voice,
+            'confidence': confidence,
+            'speech_fraction': self.speech_fraction,
+            'first_speech_time': first_speech * self.hop_length / self.sr if first_speech is not None else None,
+            'analyzed_seconds': self.seconds,
+            'features': {name: total / self.frames for name, total in self._feature_sums.items()} if self.frames else {}
         }
-        
+
+def analyze_voice_stream(blocks, sr=config.AUDIO_SAMPLE_RATE, min_seconds=config.VAD_MIN_SECONDS,
+                         min_negative_seconds=config.VAD_MIN_NEGATIVE_SECONDS, deadline=None):
+    """流式分析逐块产出的音频，结论足够确定时提前停止（关闭blocks生成器，不再解码后面的音频）
+
+    返回的结果除has_voice和confidence外还包括人声帧比例speech_fraction、
+    首次检测到人声的时间first_speech_time（秒，相对分析窗口开头）、实际分析时长和是否提前停止。
+    一帧都没有获取到、或音频源在得出结论前中途失败时返回has_voice为None的错误结果
+    （不缓存，也不覆盖关键词结果）。deadline为time.monotonic()时刻，超过后同样停止解码并返回超时错误。
+    """
+    stream = VoiceActivityStream(sr)
+    early_exit = False
+    try:
+        for block in blocks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return {'has_voice': None, 'confidence': 0.0, 'error': '音频分析超时'}
+            stream.feed(block)
+            if stream.decided(min_seconds, min_negative_seconds):
+                early_exit = True
+                break
     except Exception as e:
-        print(f"音频分析错误: {e}")
-        return {'has_voice': False, 'confidence': 0.0, 'features': {}}
-    
+        print(f"音频流分析错误: {e}")
+        return {'has_voice': None, 'confidence': 0.0, 'error': f'音频流中断: {e}'}
     finally:
-        # 清理临时文件
-        if os.path.exists(audio_file):
-            os.unlink(audio_file)
+        if hasattr(blocks, 'close'):
+            blocks.close()
+    
+    if not stream.frames:
+        return {'has_voice': None, 'confidence': 0.0, 'error': '无法下载音频'}
+    return {**stream.result(), 'early_exit': early_exit}
+
+def _audio_bytes(audio):
+    """已获取音频的大小：解码后的采样数组或临时文件"""
+    if isinstance(audio, str):
+        return os.path.getsize(audio) if os.path.exists(audio) else 0
+    return audio.nbytes
+
+def _stream_analysis(video_url, metrics, deadline=None):
+    """流式解码并检测一个视频，记录耗时、解码字节数和提前停止次数"""
+    start = time.monotonic()
+    result = analyze_voice_stream(stream_audio_blocks(video_url), deadline=deadline)
+    metrics.record('audio.stream', time.monotonic() - start)
+    if result['has_voice'] is None:
+        metrics.count('audio.download_errors')
+    else:
+        metrics.add_bytes('audio.decoded', int(result['analyzed_seconds'] * config.AUDIO_SAMPLE_RATE) * 4)
+        metrics.count('audio.early_exits', int(result['early_exit']))
+    return result
 
-def detect_voice_in_video(video_url):
-    """检测YouTube视频中的人声"""
+def detect_voice_in_video(video_url, cache=None, metrics=NULL_METRICS, streaming=config.AUDIO_STREAMING_VAD):
+    """检测YouTube视频中的人声，传入cache时优先使用缓存结果
+
+    streaming为True时用流式逐帧检测（analyze_voice_stream），否则下载整个分析窗口后一次分析。
+    """
+    video_id = video_id_from_url(video_url)
+    if cache is not None:
+        cached = cache.get(video_id)
+        if cached is not None:
+            metrics.count('audio.cache_hits')
+            return cached
+    
+    if streaming:
+        result = _stream_analysis(video_url, metrics)
+        if cache is not None:
+            cache.put(video_id, result)
+        return result
+    
     # 下载音频样本
-    audio_file = download_audio_sample(video_url)
-    if not audio_file:
+    with metrics.span('audio.download'):
+        audio = load_audio_sample(video_url)
+    if audio is None:
+        metrics.count('audio.download_errors')
         return {'has_voice': None, 'confidence': 0.0, 'error': '无法下载音频'}
+    metrics.add_bytes('audio.download', _audio_bytes(audio))
     
     # 分析音频
-    result = analyze_voice_content(audio_file)
-    return result
\ No newline at end of file
+    with metrics.span('audio.features'):
+        result = analyze_voice_content(audio)
+    if cache is not None:
+        cache.put(video_id, result)
+    return result
+
+def _timed_download(video_url, started, metrics):
+    """下载音频样本并记录实际开始时间（排队时间不计入超时）"""
+    started[video_url] = time.monotonic()
+    audio = load_audio_sample(video_url)
+    metrics.record('audio.download', time.monotonic() - started[video_url])
+    if audio is not None:
+        metrics.add_bytes('audio.download', _audio_bytes(audio))
+    return audio
+
+def _discard_audio(audio):
+    """删除不再分析的音频临时文件（没有ffmpeg时下载的完整音频）"""
+    if isinstance(audio, str) and os.path.exists(audio):
+        os.unlink(audio)
+
+def _discard_download(future):
+    """放弃的下载任务的完成回调：下载仍在进行时cancel()无效，完成后删除返回的临时文件"""
+    if not future.cancelled() and future.exception() is None:
+        _discard_audio(future.result())
+
+def _timed_analysis(audio):
+    """在分析进程中执行analyze_voice_content，返回(结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = analyze_voice_content(audio)
+    return result, time.perf_counter() - start
+
+def _timed_stream(video_url, started, metrics, timeout=None):
+    """流式检测一个视频并记录实际开始时间（排队时间不计入超时），超时后停止解码"""
+    started[video_url] = time.monotonic()
+    deadline = started[video_url] + timeout if timeout is not None else None
+    return _stream_analysis(video_url, metrics, deadline)
+
+def detect_voice_in_videos(video_urls, download_workers=config.AUDIO_DOWNLOAD_WORKERS,
+                           analysis_workers=None, timeout=config.AUDIO_TIMEOUT, cache=None, metrics=NULL_METRICS,
+                           streaming=config.AUDIO_STREAMING_VAD):
+    """并行检测多个YouTube视频中的人声
+
+    下载在I/O线程池中进行，特征分析在按CPU核数划分的进程池中进行。
+    streaming为True时每个视频在I/O线程中边解码边逐块分析（ffmpeg在独立进程中解码，
+    每块的特征计算很小），结论确定或超过timeout秒后立即停止解码，不再使用进程池
+    （特征计算在当前进程中进行，默认关闭，见config.AUDIO_STREAMING_VAD）。
+    结果按完成顺序逐个产出(video_url, result)；单个视频下载或分析超过timeout秒、
+    或出现异常时产出错误结果并跳过，不会拖住整批任务。
+    传入cache时命中缓存的视频立即产出，不再下载音频，新的成功结果写回缓存。
+    """
+    import multiprocessing
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+    
+    pending_urls = deque()
+    for video_url in video_urls:
+        cached = cache.get(video_id_from_url(video_url)) if cache is not None else None
+        if cached is not None:
+            metrics.count('audio.cache_hits')
+            yield video_url, cached
+        else:
+            pending_urls.append(video_url)
+    if not pending_urls:
+        return
+    analysis_workers = analysis_workers or os.cpu_count() or 1
+    
+    download_pool = ThreadPoolExecutor(max_workers=download_workers)
+    # spawn避免在多线程进程（如Streamlit）中fork导致死锁；流式检测不需要进程池
+    analysis_pool = None if streaming else ProcessPoolExecutor(max_workers=analysis_workers,
+                                                               mp_context=multiprocessing.get_context('spawn'))
+    started = {}
+    downloads = {}  # future -> video_url
+    analyses = {}  # future -> (video_url, deadline)
+    downloaded = deque()
+    
+    try:
+        while pending_urls or downloads or analyses or downloaded:
+            # 下载数量受线程池限制；分析任务不超过进程数，提交时间即开始时间
+            while pending_urls and len(downloads) < download_workers:
+                video_url = pending_urls.popleft()
+                if streaming:
+                    future = download_pool.submit(_timed_stream, video_url, started, metrics, timeout)
+                else:
+                    future = download_pool.submit(_timed_download, video_url, started, metrics)
+                downloads[future] = video_url
+            while downloaded and len(analyses) < analysis_workers:
+                video_url, audio = downloaded.popleft()
+                future = analysis_pool.submit(_timed_analysis, audio)
+                analyses[future] = (video_url, time.monotonic() + timeout)
+            if not downloads and not analyses:
+                continue
+            
+            now = time.monotonic()
+            deadlines = [started[url] + timeout for url in downloads.values() if url in started]
+            deadlines += [deadline for _, deadline in analyses.values()]
+            wait_timeout = max(min(deadlines) - now, 0) if deadlines else None
+            done, _ = wait(list(downloads) + list(analyses), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                if future in downloads and streaming:
+                    video_url = downloads.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        metrics.count('audio.analysis_errors')
+                        result = {'has_voice': None, 'confidence': 0.0, 'error': f'音频分析失败: {e}'}
+                    if cache is not None:
+                        cache.put(video_id_from_url(video_url), result)
+                    yield video_url, result
+                elif future in downloads:
+                    video_url = downloads.pop(future)
+                    try:
+                        audio = future.result()
+                    except Exception as e:
+                        audio = None
+                        print(f"音频下载错误: {e}")
+                    if audio is not None:
+                        downloaded.append((video_url, audio))
+                    else:
+                        metrics.count('audio.download_errors')
+                        yield video_url, {'has_voice': None, 'confidence': 0.0, 'error': '无法下载音频'}
+                else:
+                    video_url, _ = analyses.pop(future)
+                    try:
+                        result, seconds = future.result()
+                        metrics.record('audio.features', seconds)
+                    except Exception as e:
+                        metrics.count('audio.analysis_errors')
+                        result = {'has_voice': None, 'confidence': 0.0, 'error': f'音频分析失败: {e}'}
+                    if cache is not None:
+                        cache.put(video_id_from_url(video_url), result)
+                    yield video_url, result
+            
+            # 放弃超时的任务，其余任务继续
+            now = time.monotonic()
+            for future, video_url in list(downloads.items()):
+                if video_url in started and now >= started[video_url] + timeout:
+                    del downloads[future]
+                    if not future.cancel():
+                        future.add_done_callback(_discard_download)
+                    metrics.count('audio.timeouts')
+                    yield video_url, {'has_voice': None, 'confidence': 0.0,
+                                      'error': '音频分析超时' if streaming else '音频下载超时'}
+            for future, (video_url, deadline) in list(analyses.items()):
+                if now >= deadline:
+                    del analyses[future]
+                    future.cancel()
+                    metrics.count('audio.timeouts')
+                    yield video_url, {'has_voice': None, 'confidence': 0.0, 'error': '音频分析超时'}
+    finally:
+        # 提前停止迭代时，已下载未分析和仍在下载的音频不再使用
+        for future in downloads:
+            if not future.cancel():
+                future.add_done_callback(_discard_download)
+        for _, audio in downloaded:
+            _discard_audio(audio)
+        download_pool.shutdown(wait=False, cancel_futures=True)
+        if analysis_pool is not None:
+            analysis_pool.shutdown(wait=False, cancel_futures=True)
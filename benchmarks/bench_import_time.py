@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+导入耗时基准：用 python -X importtime 测量核心模块的冷启动导入时间，并检查重依赖未被提前加载
+
+超出预算或加载了禁止的模块时退出码为1，可直接用于CI。
+用法: python benchmarks/bench_import_time.py [--repeat 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['librosa', 'numpy', 'pandas', 'pytube', 'googleapiclient', 'streamlit']
+
+# 模块 -> (累计导入时间预算（毫秒）, 导入时不允许加载的模块)
+BUDGETS = {
+    'channel_analyzer': (100, HEAVY_MODULES),
+    'audio_analyzer': (50, HEAVY_MODULES),
+    'cli': (120, HEAVY_MODULES),
+}
+
+
+def measure(module):
+    """返回(模块累计导入耗时毫秒, 导入过程中加载的全部模块名)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    cumulative = None
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        loaded.add(name.strip())
+        if name.strip() == module and not name[1:].startswith(' '):
+            cumulative = int(cumulative_us) / 1000
+    return cumulative, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="核心模块导入耗时基准")
+    parser.add_argument('--repeat', type=int, default=5, help="每个模块测量次数（取最小值）")
+    args = parser.parse_args()
+
+    failed = False
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        runs = [measure(module) for _ in range(args.repeat)]
+        elapsed = min(run[0] for run in runs)
+        leaked = sorted(name for name in forbidden if any(
+            loaded_name == name or loaded_name.startswith(name + '.') for loaded_name in runs[0][1]))
+        ok = elapsed <= budget_ms and not leaked
+        failed |= not ok
+        status = '✅' if ok else '❌'
+        print(f"{status} {module:<18} {elapsed:7.1f} ms  (预算 {budget_ms} ms)")
+        if leaked:
+            print(f"   导入时加载了重依赖: {', '.join(leaked)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+离线流水线基准：用本地YouTube API替身测量抓取、处理、关键词检测、表格渲染和音频分析
+
+不需要API密钥和网络。每个阶段取多次运行的最小耗时；指定--baseline时，
+任一阶段慢于基线的tolerance倍则退出码为1，可直接用于CI。
+计时前先校验输出：增量抓取和Top-K与完整抓取一致、关键词检测与逐词子串检查一致，不一致时退出码同样为1。
+用法:
+    python benchmarks/bench_pipeline.py [--sizes 100 1000 10000] [--latency 0.005] [--failure-rate 0.02]
+    python benchmarks/bench_pipeline.py --json current.json --baseline baseline.json --tolerance 1.5
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from benchmarks.fake_youtube import FakeYouTube
+from channel_analyzer import AUDIO_ANALYSIS_AVAILABLE, detect_voiceover, get_videos, process_videos
+from table_renderer import render_page
+from voice_keywords import DEFAULT_MATCHER
+from video_results import VideoResults
+from video_store import VideoStore
+from youtube_api import YouTubeClient
+
+
+def best_time(fn, repeat):
+    """返回(最小耗时秒, 最后一次的返回值)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def crawl(fake, store=None):
+    client = YouTubeClient(fake, backoff_base=0.001, backoff_max=0.01)
+    return get_videos(client, fake.channel_ids[0], store=store)
+
+
+def reference_keywords(title, description, matcher=DEFAULT_MATCHER):
+    """逐个关键词做子串检查的参考实现，KeywordMatcher.classify应与之完全一致"""
+    text = (title + ' ' + description).lower()
+    if any(keyword in text for keyword in matcher.non_voice_keywords):
+        return {'has_voice': False, 'method': 'keyword', 'confidence': 0.9}, False
+    keyword_result = any(keyword in text for keyword in matcher.voice_keywords)
+    return {'has_voice': keyword_result, 'method': 'keyword', 'confidence': 0.7 if keyword_result else 0.3}, True
+
+
+def random_texts(count, seed=0, matcher=DEFAULT_MATCHER):
+    """随机拼接关键词、关键词片段和随机字符（随机大小写、有无空格），覆盖词内命中和重叠命中"""
+    rng = random.Random(seed)
+    keywords = matcher.voice_keywords + matcher.non_voice_keywords
+    texts = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(rng.randrange(1, 8)):
+            keyword = rng.choice(keywords)
+            kind = rng.random()
+            if kind < 0.4:
+                token = keyword
+            elif kind < 0.7:
+                start = rng.randrange(len(keyword))
+                token = keyword[start:start + rng.randrange(1, len(keyword) + 1)]
+            else:
+                token = ''.join(rng.choice('abcdeilnorstuvy 音声乐') for _ in range(rng.randrange(1, 6)))
+            tokens.append(token.upper() if rng.random() < 0.2 else token)
+        texts.append(''.join(token + rng.choice(['', ' ', '\n']) for token in tokens))
+    return texts
+
+
+def check_outputs(size, args):
+    """校验抓取和处理结果，返回不一致项的说明列表（空列表表示全部一致）"""
+    fake = FakeYouTube(channel_sizes=[size], failure_rate=args.failure_rate, seed=1)
+    top_k = max(size // 10, 1)
+    errors = []
+    ids = lambda videos: [video['id'] for video in videos]
+
+    full = ids(crawl(fake))
+    if len(full) != size:
+        errors.append(f"完整抓取返回 {len(full)} 个视频（应为 {size}）")
+    client = YouTubeClient(fake, backoff_base=0.001, backoff_max=0.01)
+    if ids(get_videos(client, fake.channel_ids[0], top_k=top_k)) != full[:top_k]:
+        errors.append(f"top_k={top_k}的结果不是完整排序的前{top_k}个")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VideoStore(os.path.join(tmp, 'video_store.db'))
+        if ids(crawl(fake, store)) != full:
+            errors.append("使用store的首次抓取与完整抓取不一致")
+        if ids(crawl(fake, store)) != full:
+            errors.append("增量抓取与完整抓取不一致")
+        if ids(get_videos(client, fake.channel_ids[0], store=store, top_k=top_k)) != full[:top_k]:
+            errors.append(f"增量抓取top_k={top_k}的结果不是完整排序的前{top_k}个")
+        store.close()
+
+    mismatched = 0
+    for record in process_videos([fake.video_data[video_id] for video_id in full]):
+        video = fake.video_data[record['link'].rsplit('=', 1)[1]]
+        expected, _ = reference_keywords(video['snippet']['title'], video['snippet']['description'])
+        actual = {'has_voice': record['is_voiceover'], 'method': record['detection_method'],
+                  'confidence': record['voice_confidence']}
+        mismatched += actual != expected
+    if mismatched:
+        errors.append(f"process_videos有 {mismatched} 个视频的关键词结果与逐词检查不一致")
+
+    texts = random_texts(size, seed=size)
+    mismatched = sum(DEFAULT_MATCHER.classify(text, '') != reference_keywords(text, '') for text in texts)
+    if mismatched:
+        errors.append(f"KeywordMatcher有 {mismatched}/{len(texts)} 条随机文本与逐词检查不一致")
+    return errors
+
+
+def bench_size(size, args):
+    """单个频道规模下各阶段的耗时（秒）"""
+    fake = FakeYouTube(channel_sizes=[size], latency=args.latency, failure_rate=args.failure_rate)
+    timings = {}
+
+    timings['get_videos'], videos = best_time(lambda: crawl(fake), args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VideoStore(os.path.join(tmp, 'video_store.db'))
+        crawl(fake, store)
+        timings['get_videos_incremental'], _ = best_time(lambda: crawl(fake, store), args.repeat)
+        store.close()
+
+    timings['process_videos'], records = best_time(lambda: process_videos(videos), args.repeat)
+    timings['detect_voiceover'], _ = best_time(lambda: [
+        detect_voiceover(video['snippet']['title'], video['snippet']['description']) for video in videos
+    ], args.repeat)
+
+    results = VideoResults.from_records(records)
+    timings['render_page'], _ = best_time(lambda: render_page(
+        results.display_frame('Asia/Tokyo', 'JST', '最新', 0, config.TABLE_PAGE_SIZE)
+    ), args.repeat)
+    timings['render_all'], _ = best_time(lambda: render_page(
+        results.display_frame('Asia/Tokyo', 'JST', '最新')
+    ), args.repeat)
+    return timings
+
+
+def write_wav(path, samples, sr):
+    """把[-1, 1]范围的浮点采样写成16位单声道WAV"""
+    import numpy as np
+
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+
+
+def audio_fixtures(directory, seconds, sr):
+    """生成音频夹具：类人声（基频滑动的谐波+音节包络）、纯音乐（稳定和弦）、白噪声"""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 140 + 60 * np.sin(2 * np.pi * 0.4 * t)
+    speech = sum(np.sin(2 * np.pi * k * np.cumsum(f0) / sr) / k for k in range(1, 10))
+    speech *= (np.sin(2 * np.pi * 4 * t) > 0) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.25 * t) ** 2)
+    music = sum(np.sin(2 * np.pi * f * t) for f in (220, 277.2, 329.6)) / 3
+    noise = rng.standard_normal(t.size) * 0.3
+
+    fixtures = {}
+    for name, samples in {'speech': 0.3 * speech + 0.01 * rng.standard_normal(t.size),
+                          'music': 0.5 * music, 'noise': noise}.items():
+        fixtures[name] = os.path.join(directory, f'{name}.wav')
+        write_wav(fixtures[name], samples, sr)
+    return fixtures
+
+
+def bench_audio(args):
+    """analyze_voice_content和流式analyze_voice_stream在WAV夹具上的耗时（秒）；音频依赖不可用时返回空结果"""
+    if not AUDIO_ANALYSIS_AVAILABLE:
+        print("⚠️ 音频分析依赖未安装，跳过音频基准", file=sys.stderr)
+        return {}
+    from audio_analyzer import analyze_voice_content, analyze_voice_stream, file_audio_blocks
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = audio_fixtures(tmp, args.audio_seconds, config.AUDIO_SAMPLE_RATE)
+        for name, path in fixtures.items():
+            def run():
+                # analyze_voice_content分析后会删除文件，每次分析一个副本
+                copy = shutil.copy(path, path + '.run.wav')
+                return analyze_voice_content(copy)
+
+            run()  # 预热（librosa导入、numba JIT）
+            timings[f'analyze_voice_content[{name}]'], result = best_time(run, args.repeat)
+            print(f"   {name}: has_voice={result['has_voice']} confidence={result['confidence']:.2f}")
+            
+            timings[f'analyze_voice_stream[{name}]'], result = best_time(
+                lambda: analyze_voice_stream(file_audio_blocks(path, args.audio_seconds)), args.repeat
+            )
+            print(f"   {name}（流式）: has_voice={result['has_voice']} speech_fraction={result['speech_fraction']:.2f} "
+                  f"已分析 {result['analyzed_seconds']:g} 秒")
+    return timings
+
+
+def compare(current, baseline, tolerance):
+    """返回慢于基线tolerance倍的阶段列表"""
+    regressions = []
+    for key, seconds in current.items():
+        if key in baseline and seconds > baseline[key] * tolerance:
+            regressions.append(f"{key}: {seconds * 1000:.1f} ms（基线 {baseline[key] * 1000:.1f} ms）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线流水线基准")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="频道视频数")
+    parser.add_argument('--latency', type=float, default=0.0, help="模拟的单次API请求延迟（秒）")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="模拟的API请求失败概率")
+    parser.add_argument('--repeat', type=int, default=3, help="每个阶段重复次数（取最小值）")
+    parser.add_argument('--audio-seconds', type=float, default=config.AUDIO_WINDOW_SECONDS, help="音频夹具时长（秒）")
+    parser.add_argument('--no-audio', action='store_true', help="跳过音频基准")
+    parser.add_argument('--json', help="把结果（秒）写入这个JSON文件")
+    parser.add_argument('--baseline', help="与这个JSON基线比较")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="允许慢于基线的倍数")
+    args = parser.parse_args()
+
+    current = {}
+    failed_checks = []
+    for size in args.sizes:
+        print(f"📊 {size} 个视频")
+        for error in check_outputs(size, args):
+            failed_checks.append(f"[{size}] {error}")
+            print(f"❌ {error}")
+        timings = bench_size(size, args)
+        for stage, seconds in timings.items():
+            # render_page只渲染一页，吞吐量没有意义
+            throughput = '' if stage == 'render_page' else f"{size / seconds:12,.0f} 视频/秒"
+            print(f"   {stage:<24} {seconds * 1000:9.1f} ms  {throughput}")
+            current[f'{stage}[{size}]'] = seconds
+
+    if not args.no_audio:
+        print(f"🎧 音频分析（{args.audio_seconds:g} 秒WAV）")
+        for key, seconds in bench_audio(args).items():
+            print(f"   {key:<40} {seconds * 1000:9.1f} ms")
+            current[key] = seconds
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}")
+    return 1 if regressions or failed_checks else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
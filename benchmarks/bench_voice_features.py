@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+人声特征提取基准：旧版四次独立librosa调用 vs 共享STFT特征引擎
+
+先在生成的夹具上校验判断结果：旧版特征（22050 Hz）按旧版阈值的判断必须与
+共享STFT特征（config.AUDIO_SAMPLE_RATE）按当前阈值的判断一致，不一致时退出码为1。
+用法: python benchmarks/bench_voice_features.py [--clips 8] [--seconds 30]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import librosa
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from audio_analyzer import classify_voice, extract_voice_features
+from benchmarks.bench_pipeline import audio_fixtures, write_wav
+
+LEGACY_SAMPLE_RATE = 22050
+# 重构前的判断阈值（针对22050 Hz、n_fft=2048的特征调定）
+LEGACY_VOICE_CENTROID_RANGE = (1000, 4000)
+LEGACY_MIN_VOICE_ZCR = 0.01
+LEGACY_MIN_MFCC_VARIANCE = 10
+FIXTURE_SAMPLE_RATE = 44100  # 夹具文件的采样率，两种实现各自用librosa.load重采样
+
+
+def synthetic_clip(seconds, sr, seed):
+    """生成带谐波和噪声的合成音频片段"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 120 + 80 * np.sin(2 * np.pi * 0.3 * t)
+    harmonics = sum(np.sin(2 * np.pi * k * np.cumsum(f0) / sr) / k for k in range(1, 8))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+    return (0.2 * harmonics * envelope + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def legacy_features(y, sr):
+    """重构前的实现：每个特征各自计算STFT/梅尔变换"""
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    zcr = librosa.feature.zero_crossing_rate(y)[0]
+    spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
+    return {
+        'avg_spectral_centroid': np.mean(spectral_centroids),
+        'avg_zcr': np.mean(zcr),
+        'avg_bandwidth': np.mean(spectral_bandwidth),
+        'mfcc_variance': np.var(mfccs)
+    }
+
+
+def legacy_has_voice(features):
+    low, high = LEGACY_VOICE_CENTROID_RANGE
+    return bool(
+        low < features['avg_spectral_centroid'] < high and
+        features['avg_zcr'] > LEGACY_MIN_VOICE_ZCR and
+        features['mfcc_variance'] > LEGACY_MIN_MFCC_VARIANCE
+    )
+
+
+def check_parity(clips, seconds):
+    """在夹具上对比旧版与当前实现的特征和判断结果，返回判断不一致的夹具名列表"""
+    mismatches = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = audio_fixtures(tmp, seconds, FIXTURE_SAMPLE_RATE)
+        for i in range(clips):
+            fixtures[f'synthetic{i}'] = os.path.join(tmp, f'synthetic{i}.wav')
+            write_wav(fixtures[f'synthetic{i}'], synthetic_clip(seconds, FIXTURE_SAMPLE_RATE, i), FIXTURE_SAMPLE_RATE)
+
+        print("判断结果一致性（旧版特征/当前特征）：")
+        for name, path in fixtures.items():
+            y_legacy, _ = librosa.load(path, sr=LEGACY_SAMPLE_RATE)
+            y, _ = librosa.load(path, sr=config.AUDIO_SAMPLE_RATE)
+            legacy = {key: float(value) for key, value in legacy_features(y_legacy, LEGACY_SAMPLE_RATE).items()}
+            current = classify_voice(extract_voice_features(y, config.AUDIO_SAMPLE_RATE))
+            ok = legacy_has_voice(legacy) == current['has_voice']
+            if not ok:
+                mismatches.append(name)
+            indicators = '  '.join(f"{key}={legacy[key]:.4g}/{current['features'][key]:.4g}" for key in legacy)
+            print(f"  {'✅' if ok else '❌'} {name:<12} has_voice={legacy_has_voice(legacy)}/{current['has_voice']}  {indicators}")
+    return mismatches
+
+
+def cpu_time(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clips', type=int, default=8, help='片段数量')
+    parser.add_argument('--seconds', type=float, default=config.AUDIO_WINDOW_SECONDS, help='每个片段时长（秒）')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    args = parser.parse_args()
+
+    mismatches = check_parity(args.clips, args.seconds)
+    if mismatches:
+        print(f"❌ 判断结果与旧版不一致: {', '.join(mismatches)}")
+
+    sr = config.AUDIO_SAMPLE_RATE
+    legacy_clips = [synthetic_clip(args.seconds, LEGACY_SAMPLE_RATE, i) for i in range(args.clips)]
+    clips = [synthetic_clip(args.seconds, sr, i) for i in range(args.clips)]
+    batch = np.stack(clips)
+
+    # 预热（numba JIT、FFT计划缓存）
+    legacy_features(legacy_clips[0], LEGACY_SAMPLE_RATE)
+    extract_voice_features(clips[0], sr)
+
+    legacy = cpu_time(lambda: [legacy_features(y, LEGACY_SAMPLE_RATE) for y in legacy_clips], args.repeat)
+    single = cpu_time(lambda: [extract_voice_features(y, sr) for y in clips], args.repeat)
+    batched = cpu_time(lambda: extract_voice_features(batch, sr), args.repeat)
+
+    print(f"{args.clips} 个 {args.seconds:g} 秒片段，单片段CPU时间：")
+    print(f"  旧版（{LEGACY_SAMPLE_RATE} Hz，四次独立变换）: {legacy / args.clips * 1000:8.1f} ms")
+    print(f"  共享STFT（{sr} Hz，逐个）:         {single / args.clips * 1000:8.1f} ms  ({legacy / single:.1f}x)")
+    print(f"  共享STFT（{sr} Hz，批量）:         {batched / args.clips * 1000:8.1f} ms  ({legacy / batched:.1f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
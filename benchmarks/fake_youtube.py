@@ -0,0 +1,183 @@
+"""
+离线YouTube Data API v3替身：按需生成合成频道和视频，可配置延迟和故障注入
+
+接口与googleapiclient的service一致（fake.videos().list(...).execute()），
+覆盖本项目用到的channels、search、playlistItems、videos四个端点，可直接传给
+YouTubeClient或get_videos等函数。同一seed生成的数据完全相同。
+
+示例:
+    fake = FakeYouTube(channel_sizes=[1000], latency=0.02, failure_rate=0.05)
+    client = YouTubeClient(fake, backoff_base=0.01)
+    get_videos(client, fake.channel_ids[0])
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# 合成标题和描述的素材，覆盖人声、非人声和无关键词三类
+VOICE_TITLES = [
+    'Guided Meditation for Deep Sleep', 'Sleep Story: The Lighthouse', 'Narrated Body Scan',
+    '冥想引导 | 放松身心', 'Talk: Letting Go of Anxiety', 'Bedtime Story for Grown-ups'
+]
+NON_VOICE_TITLES = [
+    'Rain Sounds for Sleep', 'Instrumental Piano Only', 'Ocean Sounds 10 Hours',
+    '纯音乐 | 背景音乐', 'White Noise for Focus', 'Ambient Space Drone'
+]
+NEUTRAL_TITLES = ['Deep Sleep 8 Hours', 'Relax Tonight', 'Fall Asleep Fast', '放松']
+DESCRIPTION_BOILERPLATE = (
+    "Subscribe for new videos every week: https://www.youtube.com/@fake?sub_confirmation=1\n"
+    "Follow us on Instagram and Facebook.\n"
+    "#sleep #relax #calm"
+)
+
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeRequest:
+    """单个请求：execute()时模拟网络延迟，并按故障率抛出HttpError"""
+
+    def __init__(self, fake, method, build_response):
+        self.fake = fake
+        self.method = method
+        self.build_response = build_response
+
+    def execute(self, http=None, num_retries=0):
+        self.fake.simulate_network(self.method)
+        return json.loads(json.dumps(self.build_response()))
+
+
+class _FakeResource:
+    def __init__(self, fake, name):
+        self.fake = fake
+        self.name = name
+
+    def list(self, **params):
+        handler = getattr(self.fake, f'_{self.name}_list')
+        return FakeRequest(self.fake, f'{self.name}.list', lambda: handler(**params))
+
+
+class FakeYouTube:
+    """合成数据的YouTube Data API替身
+
+    channel_sizes为每个频道的视频数，频道handle依次为fake0、fake1……；
+    latency为每次请求的平均延迟（秒，带±50%抖动）；failure_rate为请求失败的概率，
+    失败时随机抛出503或403 rateLimitExceeded（都可重试）。
+    """
+
+    def __init__(self, channel_sizes=(1000,), latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.channel_data = {}
+        self.handles = {}
+        self.video_data = {}
+        for index, size in enumerate(channel_sizes):
+            self._add_channel(index, size, random.Random(seed * 1000 + index))
+
+    @property
+    def channel_ids(self):
+        return list(self.channel_data)
+
+    def _add_channel(self, index, size, rng):
+        channel_id = f'UC{index:022d}'
+        video_ids = [f'{index:03d}v{i:07d}' for i in range(size)]
+        for i, video_id in enumerate(video_ids):
+            self.video_data[video_id] = self._make_video(video_id, i, size, rng)
+        self.channel_data[channel_id] = {
+            'id': channel_id,
+            'handle': f'fake{index}',
+            'title': f'Fake Channel {index}',
+            'uploads': f'UU{index:022d}',
+            # 上传列表按发布时间倒序
+            'video_ids': video_ids[::-1],
+            'views': sum(int(self.video_data[v]['statistics']['viewCount']) for v in video_ids),
+        }
+        self.handles[f'fake{index}'] = channel_id
+
+    @staticmethod
+    def _make_video(video_id, i, size, rng):
+        kind = rng.random()
+        titles = VOICE_TITLES if kind < 0.4 else NON_VOICE_TITLES if kind < 0.8 else NEUTRAL_TITLES
+        title = f'{rng.choice(titles)} #{i}'
+        published = START_DATE + timedelta(hours=i * 24 * 3000 / max(size, 1), minutes=rng.randrange(60))
+        return {
+            'id': video_id,
+            'snippet': {
+                'title': title,
+                'description': f'{title}\n\n{DESCRIPTION_BOILERPLATE}',
+                'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            },
+            'statistics': {'viewCount': str(int(rng.lognormvariate(9, 2)))},
+            'contentDetails': {'duration': f'PT{rng.randrange(10)}H{rng.randrange(60)}M{rng.randrange(60)}S'},
+        }
+
+    def simulate_network(self, method):
+        with self._lock:
+            self.calls[method] += 1
+            delay = self.latency * self._rng.uniform(0.5, 1.5) if self.latency else 0
+            fail = self._rng.random() < self.failure_rate
+            rate_limited = self._rng.random() < 0.5
+        if delay:
+            time.sleep(delay)
+        if fail:
+            import httplib2
+            from googleapiclient.errors import HttpError
+
+            if rate_limited:
+                content = {'error': {'code': 403, 'errors': [{'reason': 'rateLimitExceeded'}]}}
+                raise HttpError(httplib2.Response({'status': 403}), json.dumps(content).encode())
+            content = {'error': {'code': 503, 'errors': [{'reason': 'backendError'}]}}
+            raise HttpError(httplib2.Response({'status': 503}), json.dumps(content).encode())
+
+    def __getattr__(self, name):
+        if name in ('channels', 'search', 'playlistItems', 'videos'):
+            return lambda: _FakeResource(self, name)
+        raise AttributeError(name)
+
+    def _channel_resource(self, channel):
+        return {
+            'id': channel['id'],
+            'snippet': {'title': channel['title'], 'customUrl': '@' + channel['handle']},
+            'statistics': {
+                'viewCount': str(channel['views']),
+                'subscriberCount': str(channel['views'] // 100),
+                'videoCount': str(len(channel['video_ids'])),
+            },
+            'contentDetails': {'relatedPlaylists': {'uploads': channel['uploads']}},
+        }
+
+    def _channels_list(self, part, id=None, forHandle=None, forUsername=None, fields=None, **_):
+        if id is not None:
+            channel_ids = id.split(',')
+        else:
+            channel_ids = [self.handles.get((forHandle or forUsername or '').lstrip('@').lower())]
+        return {'items': [self._channel_resource(self.channel_data[c]) for c in channel_ids
+                          if c in self.channel_data]}
+
+    def _search_list(self, part, q, type=None, maxResults=5, fields=None, **_):
+        query = q.lower().lstrip('@')
+        matches = [c for c in self.channel_data.values() if query in (c['handle'] + ' ' + c['title']).lower()]
+        return {'items': [{'snippet': {'channelId': c['id']}} for c in matches[:maxResults]]}
+
+    def _playlistItems_list(self, part, playlistId, maxResults=5, pageToken=None, fields=None, **_):
+        channel = next(c for c in self.channel_data.values() if c['uploads'] == playlistId)
+        start = int(pageToken or 0)
+        end = min(start + maxResults, len(channel['video_ids']))
+        response = {'items': [{'contentDetails': {'videoId': v}} for v in channel['video_ids'][start:end]]}
+        if end < len(channel['video_ids']):
+            response['nextPageToken'] = str(end)
+        return response
+
+    def _videos_list(self, part, id, fields=None, **_):
+        parts = set(part.split(','))
+        items = []
+        for video_id in id.split(','):
+            video = self.video_data.get(video_id)
+            if video is not None:
+                items.append({'id': video_id, **{key: video[key] for key in parts if key in video}})
+        return {'items': items}
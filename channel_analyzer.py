@@ -0,0 +1,413 @@
+"""
+频道分析核心逻辑：视频抓取、数据处理和人声检测（不依赖Streamlit）
+
+googleapiclient和音频分析依赖（librosa、numpy、pytube）在首次使用时才导入，
+导入本模块本身只需要标准库。
+"""
+import heapq
+import importlib.util
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import config
+from voice_cache import VoiceCache
+from instrumentation import NULL_METRICS
+from voice_keywords import DEFAULT_MATCHER
+from youtube_api import QuotaBudgetExceeded, YouTubeClient, ensure_client
+
+# 只检查音频依赖是否已安装，不实际导入（librosa导入需要数秒）
+AUDIO_ANALYSIS_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None for module in ('librosa', 'numpy', 'pytube')
+)
+
+def build_youtube(api_key, budget=None):
+    """创建带重试、配额统计和可选配额预算的YouTube Data API客户端"""
+    from googleapiclient.discovery import build
+    
+    service = build(config.YOUTUBE_API_SERVICE_NAME, config.YOUTUBE_API_VERSION, developerKey=api_key)
+    return YouTubeClient(service, budget=budget)
+
+def _drain(pending, limit):
+    """按提交顺序收集最早的详情批次，直到在途请求数不超过limit
+
+    返回(已完成批次的视频列表, 是否全部完成)；False表示有批次因配额预算用完而未能完成。
+    """
+    batches = []
+    complete = True
+    while len(pending) > limit:
+        try:
+            batches.append(pending.pop(0).result().get('items', []))
+        except QuotaBudgetExceeded:
+            complete = False
+    return batches, complete
+
+class TopVideos:
+    """按观看量保留前k个视频的最小堆，被挤出的视频立即丢弃；k为None时保留全部"""
+    
+    def __init__(self, k=None):
+        self.k = k
+        self._heap = []
+        self._count = 0
+    
+    def push(self, video):
+        views = int(video['statistics'].get('viewCount', 0))
+        # 观看量相同时先到的优先，与稳定排序结果一致
+        entry = (views, -self._count, video)
+        self._count += 1
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def extend(self, videos):
+        for video in videos:
+            self.push(video)
+    
+    def sorted(self):
+        """按观看量降序返回保留的视频"""
+        return [video for _, _, video in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+def _timed_execute(request, metrics, name):
+    """执行API请求并记录耗时（在线程池中调用）"""
+    with metrics.span(name):
+        return request.execute()
+
+def iter_video_pages(youtube, channel_id, max_workers=config.FETCH_WORKERS, store=None, stats_ttl=config.STATS_TTL,
+                     top_k=None, metrics=NULL_METRICS):
+    """逐批产出频道视频，全部抓取完成后返回（StopIteration.value）按观看量排序的前N个
+
+    翻页与视频详情请求流水线并行：主线程沿pageToken逐页读取上传列表，
+    每页的videos().list详情请求提交到有界线程池中与后续翻页重叠执行，每完成一批就产出这批视频资源。
+
+    传入store时增量刷新：上传列表只翻到出现已知视频为止，只产出新视频，
+    已知视频仅在统计数据超过stats_ttl秒后按50个ID一批刷新观看量（只体现在返回值中）。
+    产出的各批视频互不重复，也不包含已入库的视频。
+
+    top_k不为None时只返回观看量最高的top_k个视频，内存占用与top_k成正比。
+
+    客户端的配额预算在抓取中途用完时不抛出异常：停止翻页和刷新，
+    返回已抓取视频中的前top_k个（此时清除频道的同步记录，下次完整翻阅上传列表补齐）。
+    抓取因请求出错或生成器被中途关闭而未完成时同样清除同步记录，已入库的新视频不会留下缺口。
+    """
+    youtube = ensure_client(youtube)
+    channel_record = store.get_channel(channel_id) if store else None
+    # 已入库的视频不再重复抓取详情；只有上次完整同步过的频道才在遇到已知视频时停止翻页
+    known_ids = store.known_video_ids(channel_id) if store else set()
+    if channel_record:
+        uploads_playlist_id = channel_record['uploads_playlist_id']
+    else:
+        # 获取上传播放列表ID
+        channel_response = youtube.channels().list(
+            part='contentDetails',
+            id=channel_id,
+            fields=config.CHANNEL_UPLOADS_FIELDS
+        ).execute()
+        uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+    
+    if store is None:
+        top_videos = TopVideos(top_k)
+        sink = top_videos.extend
+    else:
+        now = time.time()
+        sink = lambda videos: store.upsert_videos(channel_id, videos, now)
+    newest_video_id = None
+    complete = True
+    
+    synced = False
+    try:
+        # 获取视频列表，详情请求在线程池中并行执行
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = []
+            next_page_token = None
+            while True:
+                try:
+                    with metrics.span('get_videos.playlist_page'):
+                        playlist_response = youtube.playlistItems().list(
+                            part='contentDetails',
+                            playlistId=uploads_playlist_id,
+                            maxResults=config.PAGE_SIZE,
+                            pageToken=next_page_token,
+                            fields=config.PLAYLIST_ITEM_FIELDS
+                        ).execute()
+                except QuotaBudgetExceeded:
+                    complete = False
+                    break
+            
+                video_ids = [item['contentDetails']['videoId'] for item in playlist_response.get('items', [])]
+                if newest_video_id is None and video_ids:
+                    newest_video_id = video_ids[0]
+                new_ids = [video_id for video_id in video_ids if video_id not in known_ids]
+                metrics.count('get_videos.listed', len(video_ids))
+                metrics.count('get_videos.new', len(new_ids))
+            
+                # 获取视频详细信息（异步）
+                if new_ids:
+                    pending.append(executor.submit(_timed_execute, youtube.videos().list(
+                        part='snippet,statistics,contentDetails',
+                        id=','.join(new_ids),
+                        fields=config.VIDEO_FIELDS
+                    ), metrics, 'get_videos.details'))
+            
+                # 限制在途请求数量，先完成的批次及时收集
+                batches, drained = _drain(pending, max_workers * 2)
+                for videos in batches:
+                    sink(videos)
+                    yield videos
+                if not drained:
+                    complete = False
+                    break
+            
+                # 上传列表按时间倒序，遇到已知视频说明之后的都已入库
+                next_page_token = playlist_response.get('nextPageToken')
+                if not next_page_token or (channel_record and len(new_ids) < len(video_ids)):
+                    break
+        
+            batches, drained = _drain(pending, 0)
+            for videos in batches:
+                sink(videos)
+                yield videos
+            complete = drained and complete
+        
+            if store is None:
+                # 按观看量降序排序
+                return top_videos.sorted()
+        
+            # 已知视频只刷新过期的统计数据
+            stale_ids = store.stale_video_ids(channel_id, stats_ttl, now) if complete else []
+            batches = [stale_ids[i:i + config.PAGE_SIZE] for i in range(0, len(stale_ids), config.PAGE_SIZE)]
+            metrics.count('get_videos.stale', len(stale_ids))
+            futures = [executor.submit(_timed_execute, youtube.videos().list(
+                part='statistics',
+                id=','.join(batch),
+                fields=config.VIDEO_STATS_FIELDS
+            ), metrics, 'get_videos.refresh_stats') for batch in batches]
+            for batch, future in zip(batches, futures):
+                try:
+                    items = future.result().get('items', [])
+                except QuotaBudgetExceeded:
+                    # 未刷新的批次保持过期状态，下次分析时再刷新
+                    continue
+                store.update_statistics(items, now)
+                # 未返回的视频已被删除或设为私享
+                returned_ids = {item['id'] for item in items}
+                store.delete_videos([video_id for video_id in batch if video_id not in returned_ids])
+    
+        synced = complete
+    finally:
+        if store is not None and not synced:
+            # 本次新入库的视频与旧视频之间可能有缺口（配额用完、请求出错或生成器被中途关闭），
+            # 下次需完整翻阅上传列表补齐
+            store.forget_channel(channel_id)
+
+    if complete:
+        if newest_video_id is None and channel_record:
+            newest_video_id = channel_record['newest_video_id']
+        store.set_channel(channel_id, uploads_playlist_id, newest_video_id, now)
+    
+    return store.load_videos(channel_id, limit=top_k)
+
+def get_videos(youtube, channel_id, max_workers=config.FETCH_WORKERS, store=None, stats_ttl=config.STATS_TTL,
+               top_k=None, metrics=NULL_METRICS):
+    """获取频道所有视频，按观看量排序后返回前N个（完整抓取后一次返回，参数和行为见iter_video_pages）"""
+    with metrics.span('get_videos'), closing(
+            iter_video_pages(youtube, channel_id, max_workers, store, stats_ttl, top_k, metrics)) as pages:
+        while True:
+            try:
+                next(pages)
+            except StopIteration as done:
+                return done.value
+
+def parse_duration_seconds(duration):
+    """把YouTube的ISO 8601时长（如PT1H2M3S）解析为秒数"""
+    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
+    if match:
+        hours = int(match.group(1) or 0)
+        minutes = int(match.group(2) or 0)
+        seconds = int(match.group(3) or 0)
+        return hours * 3600 + minutes * 60 + seconds
+    return 0
+
+def parse_duration(duration):
+    """解析YouTube时长格式"""
+    seconds = parse_duration_seconds(duration)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def extract_hashtags(description):
+    """提取描述中的标签"""
+    hashtags = re.findall(r'#\w+', description)
+    return ', '.join(hashtags) if hashtags else ''
+
+def detect_voiceover_keywords(title, description, matcher=DEFAULT_MATCHER):
+    """基于关键词的人声检测，返回(检测结果, 是否值得用音频分析进一步确认)"""
+    return matcher.classify(title, description)
+
+def apply_audio_result(voice_result, audio_result):
+    """用音频分析结果覆盖关键词结果，音频分析失败时保留关键词结果"""
+    if audio_result.get('has_voice') is None:
+        return voice_result
+    return {
+        'has_voice': audio_result['has_voice'],
+        'method': 'audio',
+        'confidence': audio_result.get('confidence', 0.5)
+    }
+
+def detect_voiceover(title, description, video_url=None, use_audio_analysis=False, voice_cache=None,
+                     metrics=NULL_METRICS):
+    """增强的人声配音检测（基于关键词和音频分析）"""
+    # 先进行关键词检测
+    with metrics.span('detect_voiceover.keywords'):
+        voice_result, needs_audio = detect_voiceover_keywords(title, description)
+    
+    # 如果启用音频分析且可用
+    if needs_audio and use_audio_analysis and AUDIO_ANALYSIS_AVAILABLE and video_url:
+        try:
+            from audio_analyzer import detect_voice_in_video
+            with metrics.span('detect_voiceover.audio'):
+                audio_result = detect_voice_in_video(video_url, cache=voice_cache, metrics=metrics)
+            voice_result = apply_audio_result(voice_result, audio_result)
+        except Exception:
+            pass  # 音频分析失败，使用关键词结果
+    
+    return voice_result
+
+def build_video_record(video, voice_result):
+    """把videos().list返回的视频资源转换为结果行（原始值，显示格式由VideoResults在渲染时生成）"""
+    snippet = video['snippet']
+    description = snippet.get('description', '')
+    return {
+        'title': snippet['title'],
+        'link': f"https://www.youtube.com/watch?v={video['id']}",
+        'view_count': int(video['statistics'].get('viewCount', 0)),
+        'duration_seconds': parse_duration_seconds(video['contentDetails']['duration']),
+        'published_at': snippet['publishedAt'],
+        'description': description[:500],
+        'hashtags': extract_hashtags(description),
+        'is_voiceover': voice_result['has_voice'],
+        'voice_confidence': voice_result['confidence'],
+        'detection_method': voice_result['method']
+    }
+
+def build_records(videos, use_audio=False, progress=None, metrics=NULL_METRICS):
+    """提取字段并做关键词人声检测（整批一次完成）
+
+    返回(结果行列表, audio_targets)，audio_targets为需要音频确认的video_url -> 结果行索引
+    （未启用音频分析时为空）。
+    """
+    video_data = []
+    audio_targets = {}  # video_url -> video_data索引
+    
+    # 关键词人声检测（整批一次完成），需要音频确认的视频稍后批量分析
+    with metrics.span('process_videos.keywords'):
+        keyword_results = DEFAULT_MATCHER.classify_many(
+            [video['snippet']['title'] for video in videos],
+            [video['snippet'].get('description', '') for video in videos]
+        )
+    
+    with metrics.span('process_videos.records'):
+        for i, video in enumerate(videos):
+            if progress:
+                progress('process', i + 1, len(videos), f"处理视频 {i+1}/{len(videos)}: {video['snippet']['title'][:50]}...")
+            
+            voice_result, needs_audio = keyword_results[i]
+            record = build_video_record(video, voice_result)
+            if use_audio and AUDIO_ANALYSIS_AVAILABLE and needs_audio:
+                audio_targets[record['link']] = len(video_data)
+            video_data.append(record)
+    metrics.count('process_videos.videos', len(videos))
+    metrics.count('process_videos.audio_targets', len(audio_targets))
+    return video_data, audio_targets
+
+def iter_audio_results(video_data, audio_targets, voice_cache=None, progress=None, metrics=NULL_METRICS):
+    """并行音频分析，按完成顺序把结果回填到video_data中对应的结果行，每回填一个产出一次该行索引"""
+    if not audio_targets:
+        return
+    from audio_analyzer import detect_voice_in_videos
+    audio_results = detect_voice_in_videos(list(audio_targets), cache=voice_cache, metrics=metrics)
+    with metrics.span('process_videos.audio'):
+        for done, (video_url, audio_result) in enumerate(audio_results, 1):
+            if progress:
+                progress('audio', done, len(audio_targets), f"音频分析 {done}/{len(audio_targets)}")
+            row = video_data[audio_targets[video_url]]
+            voice_result = apply_audio_result({
+                'has_voice': row['is_voiceover'],
+                'method': row['detection_method'],
+                'confidence': row['voice_confidence']
+            }, audio_result)
+            row['is_voiceover'] = voice_result['has_voice']
+            row['voice_confidence'] = voice_result['confidence']
+            row['detection_method'] = voice_result['method']
+            yield audio_targets[video_url]
+
+def process_videos(videos, use_audio=False, voice_cache=None, progress=None, metrics=NULL_METRICS):
+    """处理视频列表：提取字段并做人声检测
+
+    关键词检测整批一次完成；启用音频分析时，需要确认的视频交给并行工作池，
+    结果按完成顺序回填。progress(stage, done, total, message)用于汇报进度，
+    stage为'process'或'audio'。
+    """
+    video_data, audio_targets = build_records(videos, use_audio, progress, metrics)
+    for _ in iter_audio_results(video_data, audio_targets, voice_cache, progress, metrics):
+        pass
+    return video_data
+
+def analyze_progressively(youtube, channel_id, store=None, top_k=None, use_audio=False, voice_cache=None,
+                          progress=None, refresh_seconds=config.PROGRESSIVE_REFRESH_SECONDS,
+                          partial_size=config.TABLE_PAGE_SIZE, metrics=NULL_METRICS):
+    """边抓取边处理，按refresh_seconds节流产出部分结果，供界面逐步刷新
+
+    产出(stage, video_data)，video_data为按观看量降序的结果行：
+    - 'crawl'：抓取中，已抓取视频里观看量前min(top_k, partial_size)个的关键词检测结果
+      （界面只显示第一页，部分结果不必处理全部已抓取视频，刷新时翻页停顿很短）
+    - 'keywords'：抓取完成，全部前top_k个的关键词检测结果，音频结果待回填
+    - 'audio'：已回填部分音频结果
+    - 'done'：最后一次产出，与get_videos加process_videos的结果相同
+    'keywords'和'done'总会产出，其余阶段距上次产出不足refresh_seconds时跳过。
+    各次产出的video_data可能是同一个列表（后续回填会修改它），需要保留快照时应立即复制或转换。
+    progress的stage另有'crawl'（total为None，done为已抓取视频数）。
+    """
+    last_refresh = time.monotonic()
+    partial_size = min(top_k or partial_size, partial_size)
+    partial = TopVideos(partial_size)
+    # 已入库的视频不会再被产出，先放入部分结果
+    if store is not None:
+        partial.extend(store.load_videos(channel_id, limit=partial_size))
+    fetched = 0
+    # 界面重跑时Streamlit在下一次st.*调用处抛出RerunException，立即关闭抓取生成器，
+    # 不等垃圾回收（异常的traceback会引用本帧），使未完成的抓取及时清除频道同步记录
+    with metrics.span('get_videos'), closing(
+            iter_video_pages(youtube, channel_id, store=store, top_k=top_k, metrics=metrics)) as pages:
+        while True:
+            try:
+                videos = next(pages)
+            except StopIteration as done:
+                videos = done.value
+                break
+            partial.extend(videos)
+            fetched += len(videos)
+            if progress:
+                progress('crawl', fetched, None, f"已获取 {fetched} 个视频")
+            if time.monotonic() - last_refresh >= refresh_seconds:
+                with metrics.span('analyze_progressively.partial'):
+                    video_data, _ = build_records(partial.sorted())
+                yield 'crawl', video_data
+                last_refresh = time.monotonic()
+    
+    video_data, audio_targets = build_records(videos, use_audio, progress, metrics)
+    yield 'keywords', video_data
+    last_refresh = time.monotonic()
+    for _ in iter_audio_results(video_data, audio_targets, voice_cache, progress, metrics):
+        if time.monotonic() - last_refresh >= refresh_seconds:
+            yield 'audio', video_data
+            last_refresh = time.monotonic()
+    yield 'done', video_data
+
+def open_voice_cache(path=config.VOICE_CACHE_PATH):
+    """打开人声检测结果缓存并清除旧版分析规则的条目；音频分析不可用时返回None"""
+    if not AUDIO_ANALYSIS_AVAILABLE:
+        return None
+    from audio_analyzer import analyzer_fingerprint
+    cache = VoiceCache(analyzer_fingerprint(), path)
+    cache.invalidate(stale_only=True)
+    return cache
@@ -0,0 +1,150 @@
+"""
+频道解析：把频道链接、@handle、用户名或频道ID解析为频道信息
+
+优先用1单位的channels().list直查（频道ID、forHandle、forUsername），
+直查不到才用100单位的search().list，并把候选频道合并为一次channels().list批量获取。
+解析结果（别名 -> 频道ID）和频道信息保存在VideoStore中，常见情况下解析不需要任何API调用。
+"""
+import re
+from urllib.parse import unquote
+
+import config
+from instrumentation import NULL_METRICS
+from youtube_api import QuotaBudgetExceeded, ensure_client
+
+CHANNEL_ID_RE = re.compile(r'^UC[a-zA-Z0-9_-]{22}$')
+
+# 链接中的频道标识：(正则, 标识类型)
+URL_PATTERNS = [
+    (re.compile(r'youtube\.com/channel/([^/?#]+)'), 'id'),
+    (re.compile(r'youtube\.com/@([^/?#]+)'), 'handle'),
+    (re.compile(r'youtube\.com/c/([^/?#]+)'), 'custom'),
+    (re.compile(r'youtube\.com/user/([^/?#]+)'), 'username'),
+]
+
+# 各标识类型依次尝试的直查参数（自定义名和普通文本可能是handle也可能是旧用户名）
+DIRECT_LOOKUPS = {
+    'handle': ['forHandle'],
+    'custom': ['forHandle', 'forUsername'],
+    'username': ['forUsername', 'forHandle'],
+    'query': ['forHandle', 'forUsername'],
+}
+
+
+def parse_channel_input(channel_url):
+    """把频道链接或输入文本解析为(标识类型, 值)
+
+    标识类型为'id'（频道ID）、'handle'（@handle）、'custom'（/c/自定义名）、
+    'username'（/user/旧用户名）或'query'（其他文本）。
+    """
+    text = channel_url.strip()
+    for pattern, kind in URL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return kind, unquote(match.group(1))
+    if text.startswith('@'):
+        return 'handle', text[1:]
+    # 其他链接取最后一段路径
+    value = unquote(text.rstrip('/').split('/')[-1])
+    if CHANNEL_ID_RE.match(value):
+        return 'id', value
+    return 'query', value.lstrip('@')
+
+
+def _list_channels(youtube, **params):
+    """channels().list，只请求频道信息用到的字段"""
+    response = youtube.channels().list(
+        part='snippet,statistics',
+        fields=config.CHANNEL_INFO_FIELDS,
+        **params
+    ).execute()
+    return response.get('items', [])
+
+
+def _lookup_direct(youtube, kind, value):
+    """按标识类型依次用forHandle/forUsername直查，每次1单位"""
+    for param in DIRECT_LOOKUPS[kind]:
+        try:
+            items = _list_channels(youtube, **{param: value})
+        except TypeError:
+            # 旧版API发现文档不支持该参数（如forHandle），跳过
+            continue
+        if items:
+            return items[0]
+    return None
+
+
+def _search_channel(youtube, value):
+    """用search().list搜索频道，候选频道一次批量获取后按自定义URL匹配，没有匹配时返回第一个结果"""
+    search_response = youtube.search().list(
+        part='snippet',
+        q=value,
+        type='channel',
+        maxResults=5,
+        fields='items(snippet(channelId))'
+    ).execute()
+    candidate_ids = list(dict.fromkeys(item['snippet']['channelId'] for item in search_response.get('items', [])))
+    if not candidate_ids:
+        return None
+
+    channels = {channel['id']: channel for channel in _list_channels(youtube, id=','.join(candidate_ids))}
+    candidates = [channels[channel_id] for channel_id in candidate_ids if channel_id in channels]
+    needle = value.lower()
+    for channel in candidates:
+        custom_url = channel['snippet'].get('customUrl', '').lower().lstrip('@')
+        if custom_url and (needle in custom_url or custom_url in needle):
+            return channel
+    return candidates[0] if candidates else None
+
+
+def resolve_channel(youtube, channel_ref, store=None, alias_ttl=config.CHANNEL_ALIAS_TTL,
+                    info_ttl=config.STATS_TTL, metrics=NULL_METRICS):
+    """把(标识类型, 值)解析为频道信息，找不到时返回None
+
+    解析顺序：别名索引 -> 频道ID直查 -> forHandle/forUsername直查 -> 搜索。
+    传入store时，别名在alias_ttl秒内、频道信息在info_ttl秒内直接复用。
+    """
+    youtube = ensure_client(youtube)
+    kind, value = channel_ref
+    alias = None if kind == 'id' else f'{kind}:{value.lower()}'
+
+    channel_id = value if kind == 'id' else (store.get_alias(alias, alias_ttl) if store else None)
+    if channel_id and store:
+        channel = store.get_channel_resource(channel_id, info_ttl)
+        if channel is not None:
+            metrics.count('resolve_channel.cache_hits')
+            return channel
+
+    channel = None
+    if channel_id:
+        items = _list_channels(youtube, id=channel_id)
+        channel = items[0] if items else None
+        if channel is None and alias and store:
+            # 索引中的频道已不存在，重新解析
+            store.delete_alias(alias)
+            channel_id = None
+    if channel is None and kind != 'id':
+        channel = _lookup_direct(youtube, kind, value)
+        if channel is None:
+            metrics.count('resolve_channel.searches')
+            channel = _search_channel(youtube, value)
+    if channel is None:
+        return None
+
+    if store:
+        store.set_channel_resource(channel)
+        if alias and channel['id'] != channel_id:
+            store.set_alias(alias, channel['id'])
+    return channel
+
+
+def get_channel_info(youtube, channel_ref, store=None, metrics=NULL_METRICS):
+    """获取频道信息，出错时打印错误并返回None（配额预算不足时抛出QuotaBudgetExceeded）"""
+    try:
+        with metrics.span('get_channel_info'):
+            return resolve_channel(youtube, channel_ref, store, metrics=metrics)
+    except QuotaBudgetExceeded:
+        raise
+    except Exception as e:
+        print(f"Error getting channel info: {e}")
+    return None
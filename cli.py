@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+YouTube频道分析器命令行版本（无界面，可用于脚本和定时任务）
+
+示例:
+    python cli.py https://www.youtube.com/@jasonstephensonmeditation --out-dir results
+    python cli.py -f channels.txt --format parquet --combined all_videos.parquet --quota-budget 8000
+    python cli.py @some_channel --format jsonl --out-dir results
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from channel_analyzer import AUDIO_ANALYSIS_AVAILABLE, build_youtube, get_videos, open_voice_cache, process_videos
+from channel_resolver import get_channel_info, parse_channel_input
+from exporter import EXPORT_FORMATS, export_results, export_to_file, open_writer
+from instrumentation import Metrics, profile_report, profiled
+from video_store import VideoStore
+from youtube_api import QuotaBudget, QuotaBudgetExceeded
+
+
+def read_channel_urls(urls, channels_file):
+    """合并命令行和文件中的频道链接（文件每行一个，#开头为注释），去重并保持顺序"""
+    channel_urls = list(urls)
+    if channels_file:
+        with open(channels_file, encoding='utf-8') as f:
+            channel_urls += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return list(dict.fromkeys(channel_urls))
+
+
+def analyze_channel(youtube, channel_url, store, voice_cache, args, metrics, profilers=None):
+    """解析并抓取单个频道，返回(频道信息, VideoResults)
+
+    配额预算在解析频道时用完则跳过该频道；抓取中途用完时保留已抓取的视频。
+    传入profilers列表时用cProfile剖析本次调用（所在的工作线程），Profile追加到列表中。
+    """
+    with profiled(profilers is not None) as profiler:
+        channel_info = get_channel_info(youtube, parse_channel_input(channel_url), store=store, metrics=metrics)
+        if not channel_info:
+            raise LookupError("无法找到频道")
+
+        videos = get_videos(youtube, channel_info['id'], store=store, top_k=args.top_k or None, metrics=metrics)
+
+        from video_results import VideoResults
+
+        video_data = process_videos(videos, use_audio=args.audio, voice_cache=voice_cache, metrics=metrics)
+        results = VideoResults.from_records(video_data)
+    if profiler is not None:
+        profilers.append(profiler)
+    return channel_info, results
+
+
+def print_api_stats(stats, file=sys.stderr):
+    """按方法输出API调用次数、配额单位、重试、错误和延迟"""
+    print(f"{'方法':<20}{'调用':>8}{'配额':>8}{'重试':>6}{'错误':>6}{'平均延迟':>10}{'最大延迟':>10}", file=file)
+    for method, counters in sorted(stats.snapshot().items()):
+        print(f"{method:<20}{counters['calls']:>8}{counters['units']:>8}{counters['retries']:>6}"
+              f"{counters['errors']:>6}{counters['latency_avg'] * 1000:>8.0f}ms{counters['latency_max'] * 1000:>8.0f}ms",
+              file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量分析YouTube频道（无界面）")
+    parser.add_argument('channels', nargs='*', help="频道链接、@handle或频道ID")
+    parser.add_argument('-f', '--channels-file', help="频道列表文件，每行一个")
+    parser.add_argument('--api-key', default=os.environ.get('YOUTUBE_API_KEY'),
+                        help="YouTube Data API密钥（默认读取环境变量YOUTUBE_API_KEY）")
+    parser.add_argument('--out-dir', default='results', help="每个频道一个输出文件的目录")
+    parser.add_argument('--combined', help="把所有频道合并写入这个文件，不再按频道分别输出")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', help="输出格式")
+    parser.add_argument('--workers', type=int, default=4, help="同时分析的频道数")
+    parser.add_argument('--top-k', type=int, default=config.TOP_K, help="每个频道保留的视频数，0表示全部")
+    parser.add_argument('--timezone', choices=list(config.TIMEZONE_OPTIONS), default='UTC', help="发布时间时区")
+    parser.add_argument('--audio', action='store_true', help="启用音频人声分析")
+    parser.add_argument('--quota-budget', type=int, default=config.API_QUOTA_BUDGET,
+                        help="本次运行最多消耗的API配额单位，用完后保留已抓取的结果")
+    parser.add_argument('--no-store', action='store_true', help="不使用本地视频元数据存储（每次完整抓取）")
+    parser.add_argument('--metrics', choices=['json', 'text'], help="结束时向stderr输出各阶段埋点（JSON日志或指标文本）")
+    parser.add_argument('--profile', metavar='PATH', help="用cProfile剖析各频道的分析线程，结果保存为pstats文件")
+    args = parser.parse_args(argv)
+
+    channel_urls = read_channel_urls(args.channels, args.channels_file)
+    if not channel_urls:
+        parser.error("请提供至少一个频道链接")
+    if not args.api_key:
+        parser.error("请通过--api-key或环境变量YOUTUBE_API_KEY提供API密钥")
+    if args.audio and not AUDIO_ANALYSIS_AVAILABLE:
+        print("⚠️ 音频分析功能不可用，请安装: pip install librosa pytube", file=sys.stderr)
+        args.audio = False
+
+    budget = QuotaBudget(args.quota_budget)
+    youtube = build_youtube(args.api_key, budget=budget)
+    metrics = Metrics()
+    metrics.api_stats = youtube.stats
+    profilers = [] if args.profile else None
+    store = None if args.no_store else VideoStore(config.VIDEO_STORE_PATH)
+    voice_cache = open_voice_cache() if args.audio else None
+    if not args.combined:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    timezone_str = config.TIMEZONE_OPTIONS[args.timezone]
+    combined_file = combined_writer = None
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(analyze_channel, youtube, channel_url, store, voice_cache, args, metrics, profilers): channel_url
+            for channel_url in channel_urls
+        }
+        for future in as_completed(futures):
+            channel_url = futures[future]
+            try:
+                channel_info, results = future.result()
+            except QuotaBudgetExceeded as e:
+                failed += 1
+                print(f"⏭️ {channel_url}: {e}", file=sys.stderr)
+                continue
+            except Exception as e:
+                failed += 1
+                print(f"❌ {channel_url}: {e}", file=sys.stderr)
+                continue
+
+            try:
+                with metrics.span('export'):
+                    if args.combined:
+                        # 每个频道完成后立即追加到合并文件，不在内存中累积
+                        if combined_writer is None:
+                            combined_file = open(args.combined, 'wb')
+                            combined_writer = open_writer(combined_file, args.format)
+                        export_results(results, combined_writer, timezone_str, args.timezone, extra_columns={
+                            'channel_id': channel_info['id'],
+                            'channel_title': channel_info['snippet']['title']
+                        })
+                    else:
+                        path = os.path.join(args.out_dir, f"{channel_info['id']}.{EXPORT_FORMATS[args.format][1]}")
+                        export_to_file(results, path, args.format, timezone_str, args.timezone)
+            except Exception as e:
+                failed += 1
+                print(f"❌ {channel_url}: 导出失败: {e}", file=sys.stderr)
+                continue
+            print(f"✅ {channel_info['snippet']['title']} ({channel_info['id']}): {len(results)} 个视频")
+
+    if combined_writer is not None:
+        combined_writer.close()
+        combined_file.close()
+        print(f"📥 已写入 {args.combined}")
+
+    print_api_stats(youtube.stats)
+    if args.metrics == 'json':
+        print(metrics.to_json(event='run', channels=len(channel_urls), failed=failed), file=sys.stderr)
+    elif args.metrics == 'text':
+        print(metrics.to_text(), end='', file=sys.stderr)
+    if profilers:
+        print(profile_report(profilers, dump_path=args.profile), file=sys.stderr)
+        print(f"🔬 剖析结果已保存到 {args.profile}", file=sys.stderr)
+    if budget.exhausted:
+        print("⚠️ 配额预算已用完，部分频道只包含已抓取的视频", file=sys.stderr)
+    print(f"📊 完成 {len(channel_urls) - failed}/{len(channel_urls)} 个频道，消耗配额 {budget.used}/{budget.units}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
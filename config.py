@@ -2,7 +2,14 @@
 YOUTUBE_API_SERVICE_NAME = 'youtube'
 YOUTUBE_API_VERSION = 'v3'
 
-# CSV输出字段
+# 时区选项（显示缩写 -> IANA时区）
+TIMEZONE_OPTIONS = {
+    "PT": "America/Los_Angeles", "ET": "America/New_York",
+    "CST": "Asia/Shanghai", "JST": "Asia/Tokyo",
+    "GMT": "Europe/London", "UTC": "UTC"
+}
+
+# 导出字段（CSV、JSONL、Parquet共用）
 CSV_COLUMNS = [
     'title',
     'link', 
@@ -11,5 +18,60 @@ CSV_COLUMNS = [
     'published_date',
     'description',
     'hashtags',
-    'is_voiceover'
-]
\ No newline at end of file
+    'is_voiceover',
+    'voice_confidence',
+    'detection_method'
+]
+EXPORT_CHUNK_SIZE = 5000  # 导出时每次格式化并写入的行数
+
+# 视频抓取配置
+PAGE_SIZE = 50  # playlistItems / videos 单次请求上限
+FETCH_WORKERS = 4  # 并行获取视频详情的线程数
+TOP_K = 100  # 默认只保留并分析观看量最高的前N个视频
+PROGRESSIVE_REFRESH_SECONDS = 1.0  # 渐进式分析时界面刷新部分结果的最短间隔（秒）
+
+# API客户端配置
+API_MAX_RETRIES = 4  # 限流、配额限制、5xx和网络错误的最大重试次数
+API_BACKOFF_BASE = 1.0  # 指数退避的初始上限（秒），实际等待时间在[0, 上限]内随机
+API_BACKOFF_MAX = 32.0  # 单次退避等待的最大值（秒）
+API_QUOTA_BUDGET = 10000  # 单次分析最多消耗的配额单位，用完后提前结束并保留已抓取结果
+
+# 部分响应字段（只请求实际用到的字段）
+CHANNEL_UPLOADS_FIELDS = 'items(contentDetails(relatedPlaylists(uploads)))'
+PLAYLIST_ITEM_FIELDS = 'nextPageToken,items(contentDetails(videoId))'
+VIDEO_FIELDS = 'items(id,snippet(title,description,publishedAt),statistics(viewCount),contentDetails(duration))'
+VIDEO_STATS_FIELDS = 'items(id,statistics(viewCount))'
+CHANNEL_INFO_FIELDS = 'items(id,snippet(title,customUrl),statistics(viewCount,subscriberCount,videoCount))'
+
+# 本地视频元数据存储
+VIDEO_STORE_PATH = 'video_store.db'
+STATS_TTL = 6 * 60 * 60  # 观看量等统计数据（含频道信息）的刷新间隔（秒）
+CHANNEL_ALIAS_TTL = 30 * 24 * 60 * 60  # @handle、用户名到频道ID的解析结果保留时间（秒）
+
+# 跨会话共享的分析结果缓存
+RESULT_CACHE_TTL = 30 * 60  # 结果保留时间（秒）
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 缓存结果的内存上限，超出时按LRU淘汰
+
+# 音频分析配置
+AUDIO_DOWNLOAD_WORKERS = 8  # 并行下载音频的线程数
+AUDIO_TIMEOUT = 120  # 单个视频下载或分析的超时时间（秒）
+AUDIO_WINDOW_SECONDS = 30  # 每个视频分析的音频总时长（秒）
+AUDIO_WINDOWS = 1  # 分析窗口数，大于1时在整个视频中均匀取多个短窗口
+AUDIO_SAMPLE_RATE = 16000  # 解码采样率，覆盖人声频段即可
+AUDIO_N_FFT = 1024  # STFT窗长（16kHz下64ms）
+AUDIO_HOP_LENGTH = 512  # STFT帧移（16kHz下32ms）
+AUDIO_STREAMING_VAD = False  # 流式逐帧人声检测（可选）：按块解码分析，结论足够确定时提前停止解码
+VAD_BLOCK_SECONDS = 1.0  # 流式检测每次解码和分析的音频块时长（秒）
+VAD_MIN_SECONDS = 2.0  # 判定有人声并提前停止前至少分析的音频时长（秒）
+VAD_MIN_NEGATIVE_SECONDS = 10.0  # 判定无人声并提前停止前至少分析的时长（秒），避免把纯音乐片头误判为无人声
+VOICE_CACHE_PATH = 'voice_cache.db'  # 人声检测结果缓存
+VOICE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 缓存总大小上限，超出后按LRU淘汰
+
+# 人声关键词配置
+EXTRA_VOICE_KEYWORDS = []  # 追加的人声关键词
+EXTRA_NON_VOICE_KEYWORDS = []  # 追加的非人声关键词
+KEYWORD_LINE_CACHE_SIZE = 10000  # 关键词扫描结果按行缓存的条目上限
+
+# 结果表格配置
+TABLE_PAGE_SIZE = 100  # 每页显示的视频数
+TABLE_CACHE_ENTRIES = 64  # 缓存的已渲染表格页数量
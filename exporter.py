@@ -0,0 +1,129 @@
+"""
+结果导出：按块把VideoResults写成CSV、JSONL或Parquet
+
+每次只格式化一块行（EXPORT_CHUNK_SIZE）并立即写入目标文件，
+导出大频道时内存中不会同时存在完整的DataFrame、CSV字符串和编码后的字节。
+"""
+import codecs
+import io
+
+import config
+
+# 导出格式 -> (MIME类型, 文件扩展名)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class CsvWriter:
+    """UTF-8-BOM编码的CSV（Excel可直接打开），表头只写一次"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._header = True
+
+    def write(self, df):
+        if self._header:
+            self.fileobj.write(codecs.BOM_UTF8)
+        self.fileobj.write(df.to_csv(index=False, header=self._header).encode('utf-8'))
+        self._header = False
+
+    def close(self):
+        pass
+
+
+class JsonlWriter:
+    """每行一个JSON对象"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def write(self, df):
+        if not df.empty:
+            text = df.to_json(orient='records', lines=True, force_ascii=False)
+            self.fileobj.write(text.rstrip('\n').encode('utf-8') + b'\n')
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """每块写成一个row group，表结构取自第一个非空块
+
+    空块的列类型无法推断（全部为null），在出现非空块之前先暂存；
+    之后的空块按已确定的表结构写入，全部为空时关闭时写入一个空表（保留列名）。
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._writer = None
+        self._empty = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            if not table.num_rows:
+                self._empty = self._empty or table
+                return
+            self._writer = pq.ParquetWriter(self.fileobj, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        import pyarrow.parquet as pq
+
+        if self._writer is None and self._empty is not None:
+            self._writer = pq.ParquetWriter(self.fileobj, self._empty.schema)
+            self._writer.write_table(self._empty)
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+
+def open_writer(fileobj, fmt):
+    """创建写入二进制文件对象的导出器，写完后需调用close()"""
+    return WRITERS[fmt](fileobj)
+
+
+def iter_chunks(results, timezone_str, tz_abbr, sort_label=None, columns=config.CSV_COLUMNS,
+                chunk_size=config.EXPORT_CHUNK_SIZE):
+    """按排序逐块返回格式化后的导出行，只包含columns中的列；没有结果时返回一个空块（保留表结构）"""
+    for start in range(0, max(len(results), 1), chunk_size):
+        yield results.display_frame(timezone_str, tz_abbr, sort_label, start, start + chunk_size)[columns]
+
+
+def export_results(results, writer, timezone_str, tz_abbr, sort_label=None, columns=config.CSV_COLUMNS,
+                   chunk_size=config.EXPORT_CHUNK_SIZE, extra_columns=None):
+    """把结果逐块写入writer
+
+    extra_columns为{列名: 值}，作为常量列插入到最前面（合并多个频道时标注来源）。
+    """
+    for chunk in iter_chunks(results, timezone_str, tz_abbr, sort_label, columns, chunk_size):
+        if extra_columns:
+            chunk = chunk.copy()
+            for position, (name, value) in enumerate(extra_columns.items()):
+                chunk.insert(position, name, value)
+        writer.write(chunk)
+
+
+def export_to_file(results, path, fmt, timezone_str, tz_abbr, sort_label=None, columns=config.CSV_COLUMNS):
+    """把结果流式写入文件"""
+    with open(path, 'wb') as f:
+        writer = open_writer(f, fmt)
+        export_results(results, writer, timezone_str, tz_abbr, sort_label, columns)
+        writer.close()
+
+
+def export_bytes(results, fmt, timezone_str, tz_abbr, sort_label=None, columns=config.CSV_COLUMNS):
+    """把结果导出为字节串（供st.download_button使用）"""
+    buffer = io.BytesIO()
+    writer = open_writer(buffer, fmt)
+    export_results(results, writer, timezone_str, tz_abbr, sort_label, columns)
+    writer.close()
+    return buffer.getvalue()
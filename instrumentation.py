@@ -0,0 +1,154 @@
+"""
+轻量级性能埋点：阶段耗时（span）、计数、字节数，以及可选的单次cProfile剖析
+
+热路径函数接收metrics参数（默认NULL_METRICS，不记录任何数据），
+一次分析共用一个Metrics实例，可在多个线程中同时记录。
+"""
+import io
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+
+class Metrics:
+    """一次分析的埋点数据（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}  # 名称 -> [次数, 总耗时, 最大耗时]（秒）
+        self.counts = Counter()
+        self.bytes = Counter()
+        self.api_stats = None  # 可选：YouTubeClient.stats，快照中一并输出
+        self.started_at = time.time()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        """记录一次已测得的耗时（用于在其他线程或进程中计时的阶段）"""
+        with self._lock:
+            span = self.spans.setdefault(name, [0, 0.0, 0.0])
+            span[0] += 1
+            span[1] += seconds
+            span[2] = max(span[2], seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def add_bytes(self, name, n):
+        with self._lock:
+            self.bytes[name] += n
+
+    def snapshot(self):
+        """返回可JSON序列化的埋点快照，耗时单位为毫秒"""
+        with self._lock:
+            spans = {
+                name: {'count': count, 'total_ms': total * 1000, 'avg_ms': total / count * 1000, 'max_ms': peak * 1000}
+                for name, (count, total, peak) in sorted(self.spans.items())
+            }
+            snapshot = {
+                'started_at': self.started_at,
+                'spans': spans,
+                'counts': dict(sorted(self.counts.items())),
+                'bytes': dict(sorted(self.bytes.items())),
+            }
+        if self.api_stats is not None:
+            snapshot['api'] = self.api_stats.snapshot()
+        return snapshot
+
+    def to_json(self, **fields):
+        """单行JSON日志，fields为附加字段（如频道ID）"""
+        return json.dumps({**fields, **self.snapshot()}, ensure_ascii=False, default=str)
+
+    def to_text(self):
+        """Prometheus文本格式的指标转储"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, span in snapshot['spans'].items():
+            lines.append(f'analyzer_span_count{{stage="{name}"}} {span["count"]}')
+            lines.append(f'analyzer_span_seconds_total{{stage="{name}"}} {span["total_ms"] / 1000:.6f}')
+            lines.append(f'analyzer_span_seconds_max{{stage="{name}"}} {span["max_ms"] / 1000:.6f}')
+        for name, value in snapshot['counts'].items():
+            lines.append(f'analyzer_count{{name="{name}"}} {value}')
+        for name, value in snapshot['bytes'].items():
+            lines.append(f'analyzer_bytes{{name="{name}"}} {value}')
+        for method, stats in snapshot.get('api', {}).items():
+            lines.append(f'youtube_api_calls{{method="{method}"}} {stats["calls"]}')
+            lines.append(f'youtube_api_quota_units{{method="{method}"}} {stats["units"]}')
+            lines.append(f'youtube_api_retries{{method="{method}"}} {stats["retries"]}')
+            lines.append(f'youtube_api_latency_seconds_total{{method="{method}"}} {stats["latency_total"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def span_rows(self):
+        """阶段耗时表（供界面显示），按总耗时降序"""
+        rows = [{'阶段': name, '次数': span['count'], '总耗时(ms)': round(span['total_ms'], 1),
+                 '平均(ms)': round(span['avg_ms'], 2), '最大(ms)': round(span['max_ms'], 1)}
+                for name, span in self.snapshot()['spans'].items()]
+        return sorted(rows, key=lambda row: row['总耗时(ms)'], reverse=True)
+
+
+class NullMetrics(Metrics):
+    """不记录任何数据的空实现，未开启埋点时使用"""
+
+    def span(self, name):
+        return nullcontext()
+
+    def record(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def add_bytes(self, name, n):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def start_profiler():
+    """开始用cProfile剖析当前线程，调用方负责profiler.disable()"""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+@contextmanager
+def profiled(enabled=True):
+    """开启时用cProfile剖析代码块（只覆盖当前线程），产出Profile对象；关闭时产出None"""
+    if not enabled:
+        yield None
+        return
+    profiler = start_profiler()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def profile_report(profilers, limit=30, sort='cumulative', dump_path=None):
+    """剖析结果中耗时最多的limit个函数（文本）
+
+    profilers可以是单个Profile或多个Profile（如每个工作线程一个）的列表，多个时合并统计。
+    指定dump_path时同时保存pstats文件，可用snakeviz等工具查看。
+    """
+    import pstats
+
+    if not isinstance(profilers, (list, tuple)):
+        profilers = [profilers]
+    stream = io.StringIO()
+    stats = pstats.Stats(*profilers, stream=stream)
+    if dump_path:
+        stats.dump_stats(dump_path)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
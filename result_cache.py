@@ -0,0 +1,127 @@
+"""
+进程内共享的分析结果缓存：按频道ID和分析选项缓存，带TTL、内存上限和单飞去重
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+
+class _Flight:
+    """一次进行中的计算，等待者在done上阻塞"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.shared = False  # 计算成功且结果可共享时为True，否则等待者重新竞争计算
+
+
+class ResultCache:
+    """多个会话共享的结果缓存（线程安全）
+
+    同一个键同时只有一个调用方（leader）执行计算，其余调用方等待并直接复用结果；
+    leader失败或结果不可缓存时由下一个等待者接手重新计算，错误和部分结果不会传给其他会话。
+    条目超过ttl秒过期；总大小超过max_bytes时按最近最少使用淘汰。
+    """
+
+    def __init__(self, ttl=config.RESULT_CACHE_TTL, max_bytes=config.RESULT_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 -> (值, 字节数, 过期时间)
+        self._flights = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.joins = 0
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key, value, size, now):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, now + self.ttl)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def get(self, key):
+        with self._lock:
+            return self._lookup(key, time.time())
+
+    def get_or_compute(self, key, compute, size_of=lambda value: 0, cache_if=lambda value: True, on_wait=None):
+        """返回(值, 来源)，来源为'hit'（缓存命中）、'joined'（等待了其他调用方的计算）或'computed'
+
+        compute()只在没有可用缓存且没有进行中的计算时调用；cache_if(值)为False的结果
+        （如配额用完时的部分结果）只返回给本次调用方，不写入缓存，也不交给等待者——
+        等待者改为自己计算（其中一个成为新的leader，其余继续等待）。
+        on_wait()在需要等待其他调用方时调用一次（如更新界面提示）。
+        """
+        waited = False
+        while True:
+            with self._lock:
+                value = self._lookup(key, time.time())
+                if value is not None:
+                    self.hits += 1
+                    return value, 'hit'
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    self.misses += 1
+                    break
+            if not waited and on_wait:
+                on_wait()
+            waited = True
+            flight.done.wait()
+            if flight.shared:
+                with self._lock:
+                    self.joins += 1
+                return flight.value, 'joined'
+
+        try:
+            value = compute()
+            if cache_if(value):
+                flight.value = value
+                flight.shared = True
+                with self._lock:
+                    self._store(key, value, size_of(value), time.time())
+            return value, 'computed'
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def invalidate(self, key=None):
+        """删除一个键的缓存，key为None时清空全部"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'in_flight': len(self._flights),
+                'hits': self.hits,
+                'misses': self.misses,
+                'joins': self.joins,
+            }
@@ -0,0 +1,63 @@
+"""
+结果表格HTML渲染：按列整体拼接字符串，只渲染当前页
+"""
+import html
+import math
+
+import numpy as np
+import pandas as pd
+
+TH_STYLE = "padding: 8px; border: 1px solid #000; text-align: center;"
+TD_STYLE = "padding: 8px; border: 1px solid #ddd; text-align: center;"
+
+TABLE_HEADER = (
+    "<div style='height: 400px; overflow-y: auto; border: 1px solid #000;'>"
+    "<table style='width:100%; border-collapse: collapse;'>"
+    "<thead style='position: sticky; top: 0; background-color: #f8f9fa;'>"
+    "<tr style='border: 1px solid #000;'>"
+    f"<th style='{TH_STYLE} width: 50px;'>#</th>"
+    "<th style='padding: 8px; border: 1px solid #000; text-align: left;'>标题</th>"
+    f"<th style='{TH_STYLE}'>观看量</th>"
+    f"<th style='{TH_STYLE}'>时长</th>"
+    f"<th style='{TH_STYLE}'>发布日期</th>"
+    f"<th style='{TH_STYLE}'>🎤人声</th>"
+    "</tr></thead><tbody>"
+)
+TABLE_FOOTER = "</tbody></table></div>"
+
+
+def page_count(total_rows, page_size):
+    return max(math.ceil(total_rows / page_size), 1)
+
+
+def render_rows(df, start=0):
+    """把DataFrame的行整体渲染为<tr>片段，序号从start+1开始
+
+    每一列先整体转换为字符串Series，再按列拼接，不逐行iterrows。
+    标题和链接做HTML转义，避免视频标题中的特殊字符破坏表格。
+    """
+    if df.empty:
+        return ''
+    index = pd.Series(np.arange(start + 1, start + len(df) + 1).astype(str), index=df.index)
+    titles = df['title'].map(html.escape)
+    links = df['link'].map(lambda link: html.escape(link, quote=True))
+    views = df['view_count'].map('{:,}'.format)
+    voice = pd.Series(np.where(df['is_voiceover'].astype(bool), '✅', '❌'), index=df.index)
+
+    rows = (
+        "<tr style='border: 1px solid #ddd;'>"
+        f"<td style='{TD_STYLE} font-weight: bold;'>" + index + "</td>"
+        "<td style='padding: 8px; border: 1px solid #ddd;'><a href='" + links
+        + "' target='_blank' style='color: #0066cc; text-decoration: none;'>" + titles + "</a></td>"
+        f"<td style='{TD_STYLE}'>" + views + "</td>"
+        f"<td style='{TD_STYLE}'>" + df['duration'].astype(str) + "</td>"
+        f"<td style='{TD_STYLE}'>" + df['published_date'].astype(str) + "</td>"
+        f"<td style='{TD_STYLE}'>" + voice + "</td>"
+        "</tr>"
+    )
+    return ''.join(rows.tolist())
+
+
+def render_page(df_page, start=0):
+    """渲染一页已排序、已格式化的结果，start为该页第一行在全部结果中的位置"""
+    return TABLE_HEADER + render_rows(df_page, start) + TABLE_FOOTER
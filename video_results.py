@@ -0,0 +1,97 @@
+"""
+分析结果的列式模型：类型化的列、预先计算的排序和显示时才做的时区格式化
+"""
+import numpy as np
+import pandas as pd
+
+WEEKDAYS_CN = np.array(['周一', '周二', '周三', '周四', '周五', '周六', '周日'], dtype=object)
+
+# 排序选项：显示名称 -> (排序列, 是否升序)
+SORT_OPTIONS = {
+    "观看量↓": ("view_count", False), "观看量↑": ("view_count", True),
+    "最新": ("published_at", False), "最早": ("published_at", True),
+    "有配音": ("is_voiceover", False), "无配音": ("is_voiceover", True)
+}
+
+# 显示/导出时的列顺序（与旧版结果行一致）
+DISPLAY_COLUMNS = [
+    'title', 'link', 'view_count', 'duration', 'published_date', 'description',
+    'hashtags', 'is_voiceover', 'voice_confidence', 'detection_method'
+]
+
+
+def format_duration(seconds):
+    """把秒数Series整体格式化为HH:MM:SS"""
+    seconds = seconds.astype('int64')
+    hours = (seconds // 3600).astype(str).str.zfill(2)
+    minutes = (seconds % 3600 // 60).astype(str).str.zfill(2)
+    secs = (seconds % 60).astype(str).str.zfill(2)
+    return hours + ':' + minutes + ':' + secs
+
+
+def format_published_date(published_at, timezone_str, tz_abbr):
+    """把UTC发布时间Series转换到指定时区并格式化为"YYYY-MM-DD HH:MM 时区 (星期)\""""
+    if timezone_str == 'UTC':
+        tz_abbr = 'UTC'
+    local = published_at.dt.tz_convert(timezone_str)
+    weekdays = pd.Series(WEEKDAYS_CN[local.dt.weekday.to_numpy()], index=published_at.index)
+    return local.dt.strftime('%Y-%m-%d %H:%M') + f' {tz_abbr} (' + weekdays + ')'
+
+
+class VideoResults:
+    """一次频道分析的结果
+
+    列以紧凑类型保存：发布时间为UTC datetime64，时长为整数秒，观看量为int64，
+    人声字段为bool/float。所有排序选项的行序在构造时一次算好，
+    时区换算和字符串格式化只在显示或导出时对需要的行进行，切换时区或排序无需重新抓取。
+    """
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self._orders = {
+            label: self.df.sort_values(column, ascending=ascending, kind='stable').index.to_numpy()
+            for label, (column, ascending) in SORT_OPTIONS.items()
+        }
+
+    @classmethod
+    def from_records(cls, records):
+        """由channel_analyzer.process_videos返回的结果行构造"""
+        df = pd.DataFrame.from_records(records, columns=[
+            'title', 'link', 'view_count', 'duration_seconds', 'published_at', 'description',
+            'hashtags', 'is_voiceover', 'voice_confidence', 'detection_method'
+        ])
+        df = df.astype({
+            'view_count': 'int64',
+            'duration_seconds': 'int64',
+            'is_voiceover': 'bool',
+            'voice_confidence': 'float64'
+        })
+        df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
+        return cls(df)
+
+    def __len__(self):
+        return len(self.df)
+
+    def memory_bytes(self):
+        """结果占用的内存（字节，含字符串内容和排序索引）"""
+        return int(self.df.memory_usage(deep=True).sum()) + sum(order.nbytes for order in self._orders.values())
+
+    def order(self, sort_label):
+        """返回某个排序选项对应的行号排列"""
+        return self._orders[sort_label]
+
+    def sorted_frame(self, sort_label, start=0, stop=None):
+        """按排序选项返回[start, stop)范围内的行（原始类型）"""
+        return self.df.iloc[self._orders[sort_label][start:stop]]
+
+    def display_frame(self, timezone_str, tz_abbr, sort_label=None, start=0, stop=None):
+        """返回格式化后的显示/导出表：只对[start, stop)范围内的行做时区换算和格式化"""
+        if sort_label is None:
+            rows = self.df.iloc[start:stop]
+        else:
+            rows = self.sorted_frame(sort_label, start, stop)
+        display = rows.assign(
+            duration=format_duration(rows['duration_seconds']),
+            published_date=format_published_date(rows['published_at'], timezone_str, tz_abbr)
+        )
+        return display[DISPLAY_COLUMNS]
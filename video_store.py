@@ -0,0 +1,173 @@
+"""
+本地视频元数据存储（SQLite），支持增量刷新
+"""
+import json
+import sqlite3
+import threading
+import time
+
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id TEXT PRIMARY KEY,
+    uploads_playlist_id TEXT NOT NULL,
+    newest_video_id TEXT,
+    crawled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    view_count INTEGER NOT NULL DEFAULT 0,
+    resource TEXT NOT NULL,
+    stats_updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos (channel_id, stats_updated_at);
+CREATE TABLE IF NOT EXISTS channel_aliases (
+    alias TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS channel_resources (
+    channel_id TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class VideoStore:
+    """按频道ID和视频ID索引的视频元数据存储
+
+    channels表记录上传列表ID和最近一次见到的最新视频，videos表保存
+    精简后的视频资源（与videos().list返回结构一致）及统计数据更新时间。
+    channel_aliases表是@handle、用户名等到频道ID的解析索引，
+    channel_resources表缓存频道信息（channels().list返回的snippet和statistics）。
+    """
+
+    def __init__(self, path=config.VIDEO_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_channel(self, channel_id):
+        """返回频道记录，未完整抓取过则返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT uploads_playlist_id, newest_video_id, crawled_at FROM channels WHERE channel_id = ?',
+                (channel_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'uploads_playlist_id': row[0], 'newest_video_id': row[1], 'crawled_at': row[2]}
+
+    def set_channel(self, channel_id, uploads_playlist_id, newest_video_id, now=None):
+        """记录一次完整（或增量）抓取完成"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO channels VALUES (?, ?, ?, ?)',
+                (channel_id, uploads_playlist_id, newest_video_id, now or time.time())
+            )
+
+    def get_alias(self, alias, ttl, now=None):
+        """返回ttl秒内解析过的频道ID，没有或已过期时返回None"""
+        cutoff = (now or time.time()) - ttl
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT channel_id FROM channel_aliases WHERE alias = ? AND resolved_at >= ?', (alias, cutoff)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_alias(self, alias, channel_id, now=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO channel_aliases VALUES (?, ?, ?)', (alias, channel_id, now or time.time())
+            )
+
+    def delete_alias(self, alias):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM channel_aliases WHERE alias = ?', (alias,))
+
+    def get_channel_resource(self, channel_id, ttl, now=None):
+        """返回ttl秒内抓取过的频道信息，没有或已过期时返回None"""
+        cutoff = (now or time.time()) - ttl
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT resource FROM channel_resources WHERE channel_id = ? AND updated_at >= ?',
+                (channel_id, cutoff)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_channel_resource(self, channel, now=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO channel_resources VALUES (?, ?, ?)',
+                (channel['id'], json.dumps(channel, ensure_ascii=False), now or time.time())
+            )
+
+    def forget_channel(self, channel_id):
+        """删除频道的同步记录（保留视频），下次抓取会完整翻阅上传列表"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM channels WHERE channel_id = ?', (channel_id,))
+
+    def known_video_ids(self, channel_id):
+        with self._lock:
+            rows = self._conn.execute('SELECT video_id FROM videos WHERE channel_id = ?', (channel_id,))
+            return {row[0] for row in rows}
+
+    def upsert_videos(self, channel_id, videos, now=None):
+        """写入或覆盖视频资源"""
+        now = now or time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?)',
+                [(video['id'], channel_id, int(video['statistics'].get('viewCount', 0)),
+                  json.dumps(video, ensure_ascii=False), now) for video in videos]
+            )
+
+    def stale_video_ids(self, channel_id, ttl, now=None):
+        """返回统计数据超过ttl秒未刷新的视频ID"""
+        cutoff = (now or time.time()) - ttl
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT video_id FROM videos WHERE channel_id = ? AND stats_updated_at < ?',
+                (channel_id, cutoff)
+            )
+            return [row[0] for row in rows]
+
+    def update_statistics(self, items, now=None):
+        """用videos().list(part='statistics')的结果刷新观看量"""
+        now = now or time.time()
+        with self._lock, self._conn:
+            for item in items:
+                row = self._conn.execute(
+                    'SELECT resource FROM videos WHERE video_id = ?', (item['id'],)
+                ).fetchone()
+                if row is None:
+                    continue
+                video = json.loads(row[0])
+                video['statistics'] = item['statistics']
+                self._conn.execute(
+                    'UPDATE videos SET view_count = ?, resource = ?, stats_updated_at = ? WHERE video_id = ?',
+                    (int(item['statistics'].get('viewCount', 0)), json.dumps(video, ensure_ascii=False),
+                     now, item['id'])
+                )
+
+    def delete_videos(self, video_ids):
+        """删除已下架或设为私享的视频"""
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM videos WHERE video_id = ?', [(v,) for v in video_ids])
+
+    def load_videos(self, channel_id, limit=None):
+        """按观看量降序返回频道的视频资源，limit为None时返回全部"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT resource FROM videos WHERE channel_id = ? ORDER BY view_count DESC, rowid LIMIT ?',
+                (channel_id, -1 if limit is None else limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
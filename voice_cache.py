@@ -0,0 +1,99 @@
+"""
+人声检测结果缓存（SQLite），按视频ID和分析器指纹寻址
+"""
+import json
+import sqlite3
+import threading
+import time
+
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS voice_results (
+    video_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (video_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS idx_voice_results_access ON voice_results (last_access);
+"""
+
+
+class VoiceCache:
+    """音频人声检测结果的持久缓存
+
+    键为(视频ID, 分析器指纹)：视频音频不会变化，分析规则或参数变化时指纹随之改变，
+    旧条目自然失效。总大小超过max_bytes时按最近访问时间淘汰（LRU）。
+    """
+
+    def __init__(self, fingerprint, path=config.VOICE_CACHE_PATH, max_bytes=config.VOICE_CACHE_MAX_BYTES):
+        self.fingerprint = fingerprint
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, video_id):
+        """返回缓存的检测结果，未命中返回None"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT result FROM voice_results WHERE video_id = ? AND fingerprint = ?',
+                (video_id, self.fingerprint)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                'UPDATE voice_results SET last_access = ? WHERE video_id = ? AND fingerprint = ?',
+                (time.time(), video_id, self.fingerprint)
+            )
+        return json.loads(row[0])
+
+    def put(self, video_id, result):
+        """写入检测结果；失败结果（has_voice为None）不缓存"""
+        if result.get('has_voice') is None:
+            return
+        payload = json.dumps(result, ensure_ascii=False, default=float)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO voice_results VALUES (?, ?, ?, ?, ?)',
+                (video_id, self.fingerprint, payload, len(payload), time.time())
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM voice_results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 从最久未访问的条目开始删除，直到总大小回到上限以内
+        to_delete = []
+        for video_id, fingerprint, size in self._conn.execute(
+                'SELECT video_id, fingerprint, size FROM voice_results ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            to_delete.append((video_id, fingerprint))
+            total -= size
+        self._conn.executemany('DELETE FROM voice_results WHERE video_id = ? AND fingerprint = ?', to_delete)
+
+    def invalidate(self, video_ids=None, stale_only=False):
+        """清除缓存
+
+        stale_only为True时只删除其他指纹（旧版分析规则）的条目；否则删除当前指纹下
+        video_ids对应的条目，video_ids为None时删除全部条目。
+        """
+        with self._lock, self._conn:
+            if stale_only:
+                self._conn.execute('DELETE FROM voice_results WHERE fingerprint != ?', (self.fingerprint,))
+            elif video_ids is None:
+                self._conn.execute('DELETE FROM voice_results')
+            else:
+                self._conn.executemany(
+                    'DELETE FROM voice_results WHERE video_id = ? AND fingerprint = ?',
+                    [(video_id, self.fingerprint) for video_id in video_ids]
+                )
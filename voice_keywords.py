@@ -0,0 +1,135 @@
+"""
+人声关键词匹配：关键词表编译成单个正则，一次扫描即可得到全部命中
+"""
+import re
+
+import config
+
+# 按语言分组的关键词表
+VOICE_KEYWORDS = {
+    'en': [
+        'voiceover', 'voice over', 'narration', 'narrator', 'commentary', 'spoken', 'talking',
+        'guided', 'meditation', 'story', 'storytelling', 'reading', 'audiobook', 'podcast',
+        'interview', 'conversation', 'discussion', 'lecture', 'tutorial', 'explanation',
+        'teaching', 'instruction', 'speaking', 'talk', 'voice', 'audio', 'sound'
+    ],
+    'zh': [
+        '配音', '解说', '讲解', '教学', '教程', '故事', '导览', '冥想', '引导',
+        '讲话', '讲座', '访谈', '对话', '讨论', '声音', '音频'
+    ]
+}
+
+NON_VOICE_KEYWORDS = {
+    'en': [
+        'instrumental', 'music only', 'no voice', 'no talking', 'silent', 'ambient',
+        'nature sounds', 'rain sounds', 'ocean sounds', 'white noise', 'background music',
+        'piano only', 'guitar only', 'orchestral', 'classical music', 'jazz instrumental'
+    ],
+    'zh': [
+        '纯音乐', '无人声', '背景音乐', '环境声', '自然声', '雨声', '海洋声'
+    ]
+}
+
+
+def _trie_pattern(keywords):
+    """把关键词合并成前缀树形式的正则，公共前缀只比较一次，同一位置优先匹配最长的词"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie) if keywords else '(?!)'
+
+
+class KeywordMatcher:
+    """人声/非人声关键词匹配器
+
+    两组关键词编译成一个前缀树正则，在文本的每个位置先尝试非人声词再尝试人声词，
+    分类结果与逐个执行`keyword in text`完全一致，耗时基本不随关键词数量增长。
+    文本按行缓存扫描结果，同一频道描述中重复的模板段落（链接、订阅提示等）只扫描一次。
+    """
+
+    def __init__(self, voice_keywords, non_voice_keywords, cache_size=config.KEYWORD_LINE_CACHE_SIZE):
+        self.voice_keywords = sorted({keyword.lower() for keyword in voice_keywords if keyword})
+        self.non_voice_keywords = sorted({keyword.lower() for keyword in non_voice_keywords if keyword})
+        self._pattern = re.compile('(?=(?:({})|({})))'.format(
+            _trie_pattern(self.non_voice_keywords), _trie_pattern(self.voice_keywords)
+        ))
+        self._cache_size = cache_size
+        self._line_cache = {}
+
+    def _scan_line(self, line):
+        hits = self._line_cache.get(line)
+        if hits is None:
+            non_voice_hits, voice_hits = set(), set()
+            for non_voice, voice in self._pattern.findall(line):
+                if non_voice:
+                    non_voice_hits.add(non_voice)
+                else:
+                    voice_hits.add(voice)
+            hits = (frozenset(non_voice_hits), frozenset(voice_hits))
+            if len(self._line_cache) >= self._cache_size:
+                self._line_cache.clear()
+            self._line_cache[line] = hits
+        return hits
+
+    def find(self, text):
+        """返回(命中的非人声关键词集合, 命中的人声关键词集合)"""
+        non_voice_hits, voice_hits = set(), set()
+        # 关键词不含换行，逐行扫描与整体扫描结果相同
+        for line in text.lower().split('\n'):
+            line_non_voice, line_voice = self._scan_line(line)
+            non_voice_hits |= line_non_voice
+            voice_hits |= line_voice
+        return non_voice_hits, voice_hits
+
+    def classify(self, title, description):
+        """基于关键词的人声检测，返回(检测结果, 是否值得用音频分析进一步确认)"""
+        non_voice_hits, voice_hits = self.find(title + ' ' + description)
+
+        # 命中非人声关键词直接判定
+        if non_voice_hits:
+            return {'has_voice': False, 'method': 'keyword', 'confidence': 0.9}, False
+
+        keyword_result = bool(voice_hits)
+        return {'has_voice': keyword_result, 'method': 'keyword', 'confidence': 0.7 if keyword_result else 0.3}, True
+
+    def classify_many(self, titles, descriptions):
+        """批量分类，titles与descriptions一一对应（列表或pandas Series均可）"""
+        return [self.classify(title or '', description or '') for title, description in zip(titles, descriptions)]
+
+    def classify_frame(self, df, title_column='title', description_column='description'):
+        """对DataFrame整体分类，返回与df同索引的is_voiceover/voice_confidence/detection_method列"""
+        import pandas as pd
+
+        results = self.classify_many(df[title_column], df[description_column])
+        return pd.DataFrame({
+            'is_voiceover': [result['has_voice'] for result, _ in results],
+            'voice_confidence': [result['confidence'] for result, _ in results],
+            'detection_method': [result['method'] for result, _ in results],
+            'needs_audio': [needs_audio for _, needs_audio in results]
+        }, index=df.index)
+
+
+def build_matcher(languages=None, extra_voice_keywords=(), extra_non_voice_keywords=()):
+    """按语言组合内置关键词表并追加自定义关键词，languages为None时使用全部语言"""
+    languages = languages or sorted(set(VOICE_KEYWORDS) | set(NON_VOICE_KEYWORDS))
+    voice_keywords = [keyword for lang in languages for keyword in VOICE_KEYWORDS.get(lang, [])]
+    non_voice_keywords = [keyword for lang in languages for keyword in NON_VOICE_KEYWORDS.get(lang, [])]
+    return KeywordMatcher(voice_keywords + list(extra_voice_keywords),
+                          non_voice_keywords + list(extra_non_voice_keywords))
+
+
+DEFAULT_MATCHER = build_matcher(
+    extra_voice_keywords=config.EXTRA_VOICE_KEYWORDS,
+    extra_non_voice_keywords=config.EXTRA_NON_VOICE_KEYWORDS
+)
@@ -0,0 +1,176 @@
+"""
+YouTube Data API客户端封装：重试退避、连接复用、配额与延迟统计、配额预算
+"""
+import json
+import random
+import threading
+import time
+
+import config
+
+# 各方法每次调用消耗的配额单位（未列出的为1）
+QUOTA_COSTS = {
+    'search.list': 100,
+}
+
+# 可重试的403错误原因（速率或配额限制）
+RETRYABLE_REASONS = {'quotaExceeded', 'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+class QuotaBudgetExceeded(Exception):
+    """API配额预算不足"""
+
+
+class QuotaBudget:
+    """可在多个频道、多个线程间共享的API配额预算"""
+
+    def __init__(self, units):
+        self.units = units
+        self.used = 0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def charge(self, units):
+        """扣除配额，剩余不足时抛出QuotaBudgetExceeded且不扣除"""
+        with self._lock:
+            if self.used + units > self.units:
+                self.exhausted = True
+                raise QuotaBudgetExceeded(f"配额预算不足：需要 {units}，剩余 {self.units - self.used}")
+            self.used += units
+
+    @property
+    def remaining(self):
+        return self.units - self.used
+
+
+class ApiStats:
+    """按方法统计调用次数、配额单位、重试、错误和延迟（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def record(self, method, units, latency, retried=False, failed=False):
+        with self._lock:
+            stats = self._methods.setdefault(method, {
+                'calls': 0, 'units': 0, 'retries': 0, 'errors': 0, 'latency_total': 0.0, 'latency_max': 0.0
+            })
+            stats['calls'] += 1
+            stats['units'] += units
+            stats['retries'] += int(retried)
+            stats['errors'] += int(failed)
+            stats['latency_total'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+
+    def snapshot(self):
+        """返回 {方法: 计数器} 的副本，附带平均延迟"""
+        with self._lock:
+            methods = {method: dict(stats) for method, stats in self._methods.items()}
+        for stats in methods.values():
+            stats['latency_avg'] = stats['latency_total'] / stats['calls'] if stats['calls'] else 0.0
+        return methods
+
+    @property
+    def total_units(self):
+        with self._lock:
+            return sum(stats['units'] for stats in self._methods.values())
+
+
+def _error_reason(error):
+    """从HttpError中取出错误原因（如quotaExceeded）"""
+    details = getattr(error, 'error_details', None)
+    if isinstance(details, list) and details and isinstance(details[0], dict):
+        return details[0].get('reason')
+    try:
+        return json.loads(error.content)['error']['errors'][0]['reason']
+    except Exception:
+        return None
+
+
+def _is_retryable(error):
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        return status == 429 or status >= 500 or (status == 403 and _error_reason(error) in RETRYABLE_REASONS)
+    return isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+
+class TrackedRequest:
+    """包装单个API请求，execute()时经过客户端的重试、计量和预算检查"""
+
+    def __init__(self, client, method, request):
+        self.client = client
+        self.method = method
+        self.request = request
+
+    def execute(self):
+        return self.client.execute(self.method, self.request)
+
+
+class _Resource:
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+
+    def list(self, **kwargs):
+        request = getattr(self._client.service, self._name)().list(**kwargs)
+        return TrackedRequest(self._client, f'{self._name}.list', request)
+
+
+class YouTubeClient:
+    """共享的YouTube Data API客户端
+
+    用法与googleapiclient的service一致（client.videos().list(...).execute()），额外提供：
+    - 每个线程复用自己的持久HTTP连接（httplib2不是线程安全的）
+    - 429/5xx/403配额或速率限制及网络错误按带抖动的指数退避重试
+    - 按方法统计配额单位、调用次数、重试、错误和延迟
+    - 可选配额预算，超出时抛出QuotaBudgetExceeded，由调用方提前结束并保留已抓取结果
+    """
+
+    def __init__(self, service, budget=None, max_retries=config.API_MAX_RETRIES,
+                 backoff_base=config.API_BACKOFF_BASE, backoff_max=config.API_BACKOFF_MAX):
+        self.service = service
+        self.budget = budget
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = ApiStats()
+        self._thread_local = threading.local()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda: _Resource(self, name)
+
+    def _http(self):
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            from googleapiclient.http import build_http
+            http = self._thread_local.http = build_http()
+        return http
+
+    def execute(self, method, request):
+        """执行请求：预算检查 -> 执行 -> 失败时退避重试，每次尝试都计入统计"""
+        cost = QUOTA_COSTS.get(method, 1)
+        for attempt in range(self.max_retries + 1):
+            if self.budget is not None:
+                self.budget.charge(cost)
+            start = time.perf_counter()
+            try:
+                response = request.execute(http=self._http())
+            except Exception as e:
+                retryable = _is_retryable(e) and attempt < self.max_retries
+                self.stats.record(method, cost, time.perf_counter() - start, retried=retryable, failed=True)
+                if not retryable:
+                    raise
+                # 完全抖动的指数退避
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+                continue
+            self.stats.record(method, cost, time.perf_counter() - start)
+            return response
+
+
+def ensure_client(youtube):
+    """把googleapiclient的service包装为YouTubeClient（已经是客户端则原样返回）"""
+    return youtube if isinstance(youtube, YouTubeClient) else YouTubeClient(youtube)